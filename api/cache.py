@@ -0,0 +1,103 @@
+"""In-process response cache for the read-heavy endpoints.
+
+Event data only changes when a scrape, search or retention run commits, and
+each of those bumps the data generation (see database.bump_generation). A
+rendered response is kept under its endpoint and normalized query parameters
+and reused while the generation is unchanged, for at most MAX_AGE seconds
+since listings also depend on the clock.
+
+Every response carries a strong ETag (a hash of the body) and Cache-Control.
+A request whose If-None-Match matches gets an empty 304, so RSS readers
+polling an unchanged feed cost a dictionary lookup.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from fastapi import Request, Response
+
+from database import get_generation
+
+CACHE_CONTROL = "public, max-age=60"
+MAX_ENTRIES = 256
+MAX_AGE = 300  # s
+GENERATION_CHECK_INTERVAL = 2  # s between reads of the data generation
+
+
+class CachedResponse:
+    __slots__ = ("generation", "body", "media_type", "etag", "created")
+
+    def __init__(self, generation: int, body: bytes, media_type: str):
+        self.generation = generation
+        self.body = body
+        self.media_type = media_type
+        self.etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+        self.created = time.monotonic()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison
+    candidates = (c.strip() for c in if_none_match.split(","))
+    return etag in (c[2:] if c.startswith("W/") else c for c in candidates)
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_age: float = MAX_AGE):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = (0, None)
+        self._generation_checked = None
+
+    def generation(self, session):
+        """(generation, changed_at), read from the database at most every few seconds."""
+        now = time.monotonic()
+        if self._generation_checked is None or now - self._generation_checked >= GENERATION_CHECK_INTERVAL:
+            self._generation = get_generation(session)
+            self._generation_checked = now
+        return self._generation
+
+    def get(self, key: Hashable, session, render: Callable[[], tuple[bytes, str]]) -> CachedResponse:
+        """The cached response for `key`, rendered again if stale or missing."""
+        generation, _ = self.generation(session)
+        with self._lock:
+            entry = self._entries.get(key)
+            if (
+                entry is not None
+                and entry.generation == generation
+                and time.monotonic() - entry.created < self.max_age
+            ):
+                self._entries.move_to_end(key)
+                return entry
+
+        body, media_type = render()
+        entry = CachedResponse(generation, body, media_type)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def respond(self, request: Request, key: Hashable, session, render: Callable[[], tuple[bytes, str]]) -> Response:
+        """Serve `key` from the cache, or a 304 if the client already has it."""
+        entry = self.get(key, session, render)
+        headers = {"ETag": entry.etag, "Cache-Control": CACHE_CONTROL}
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type=entry.media_type, headers=headers)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,101 @@
+"""Fragment render cache for the event listing page.
+
+The page is assembled from fragments rendered from templates/partials: the
+source chips, the filter bar and the cards of each day. A fragment is cached
+under a hash of exactly the values it displays, so after an ingest only the
+days and source lists whose events actually changed are rendered again, and
+a page view is mostly a concatenation of cached fragments.
+
+The response cache (api.cache) still sits in front of the home page; this
+cache makes the re-render after each data change cheap.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from itertools import groupby
+from typing import Optional
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup
+
+from database import Event
+
+MAX_FRAGMENTS = 1024
+HOME_LIMIT = 300
+
+# Only what the cards display; the fragment keys hash these values
+CARD_COLUMNS = (Event.id, Event.title, Event.date, Event.location, Event.url, Event.source)
+
+env = Environment(loader=FileSystemLoader("templates"), autoescape=select_autoescape())
+
+
+def content_hash(context: dict) -> str:
+    return hashlib.sha256(repr(sorted(context.items())).encode()).hexdigest()
+
+
+class FragmentCache:
+    def __init__(self, max_entries: int = MAX_FRAGMENTS):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, name: str, **context) -> Markup:
+        """partials/`name` rendered with `context`, reused while `context` is unchanged."""
+        key = (name, content_hash(context))
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return html
+
+        html = Markup(env.get_template(f"partials/{name}").render(**context))
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = html
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return html
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+fragment_cache = FragmentCache()
+
+
+def page_events(session, start: datetime, limit: Optional[int] = HOME_LIMIT) -> list:
+    """Active events from `start` on, as rows of CARD_COLUMNS."""
+    query = session.query(*CARD_COLUMNS).filter(
+        Event.is_active == True,
+        Event.date >= start
+    ).order_by(Event.date, Event.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+
+def render_page(events: list, sources: list, total: int) -> str:
+    """
+    The listing page for `events` (rows of CARD_COLUMNS, ordered by date) and
+    `sources` ((name, count) pairs of those events, in display order). When
+    `total`, the number of upcoming events, is larger than what is shown, the
+    page says so.
+    """
+    day_cards = [
+        fragment_cache.render("day_cards.html", day=day, events=list(rows))
+        for day, rows in groupby(events, key=lambda row: row.date.date())
+    ]
+    return env.get_template("index.html").render(
+        source_chips=fragment_cache.render(
+            "source_chips.html", shown=len(events), total=total, sources=sources,
+        ),
+        filter_bar=fragment_cache.render("filter_bar.html", sources=[name for name, _ in sources]),
+        day_cards=day_cards,
+    )
+
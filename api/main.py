@@ -1,16 +1,34 @@
 """Boston Events Aggregator - FastAPI Application."""
 
-import pytz
+import base64
+import csv
+import io
+import json
+import logging
+import threading
+import time
+from collections import Counter
 from datetime import datetime, timedelta
 from typing import Optional
 
-from fastapi import FastAPI, Query, Request, Response
-from fastapi.responses import HTMLResponse
+from anyio import to_thread
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from feedgen.feed import FeedGenerator
 
-from database import init_db, get_engine, get_session, Event
+import orjson
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+
+from api.cache import response_cache
+from api.fragments import page_events, render_page
+from database import init_db, get_db, get_engine, filter_by_tag, normalize_tag, session_scope, ArchivedEvent, Event
+from database.facets import get_facets, source_names
+from database.search import full_text_search
+from feeds import MEDIA_TYPES, load_feed
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Boston Events Aggregator",
@@ -18,12 +36,52 @@ app = FastAPI(
     version="1.0.0"
 )
 
-app.mount("/logo", StaticFiles(directory="logo"), name="logo")
+# logo/ is not part of the repository; importing the app must work without it
+app.mount("/logo", StaticFiles(directory="logo", check_dir=False), name="logo")
 
 # Initialize database on startup
 @app.on_event("startup")
 async def startup():
     init_db()
+    # The handlers below that touch the database are plain functions, which
+    # FastAPI runs in anyio's threadpool so queries and feed rendering never
+    # block the event loop. One thread per connection the pool can hand out.
+    threads = thread_limit(get_engine())
+    if threads is not None:
+        to_thread.current_default_thread_limiter().total_tokens = threads
+    await to_thread.run_sync(warm_cache)
+
+
+def thread_limit(engine) -> Optional[int]:
+    """
+    Connections `engine`'s pool can hand out at once, or None to keep anyio's
+    default: SQLite serializes writers and does not use the server pool sizes.
+    """
+    if engine.dialect.name == "sqlite" or not isinstance(engine.pool, QueuePool):
+        return None
+    return engine.pool.size() + engine.pool._max_overflow
+
+
+def warm_cache():
+    """Render the default feed, event list, facets and home page into the response cache."""
+    request = Request({"type": "http", "headers": []})
+    try:
+        with session_scope() as session:
+            rss_feed(request, source=None, tag=None, days=30, session=session)
+            get_events(
+                request, source=None, tag=None, days=30, limit=50, offset=0,
+                cursor=None, include_total=True, session=session,
+            )
+            facet_counts(request, session=session)
+            home(request, session=session)
+    except Exception as e:
+        # An empty cache only costs the first requests a render
+        logger.warning(f"Warming the response cache failed: {e}")
+
+
+def cache_key(name: str, source: Optional[str] = None, tag: Optional[str] = None, *rest) -> tuple:
+    """Response cache key with the filters normalized as the queries apply them."""
+    return (name, source.lower() if source else None, normalize_tag(tag) if tag else None, *rest)
 
 # Health check
 @app.get("/health")
@@ -32,161 +90,332 @@ async def health():
 
 # RSS Feed
 @app.get("/rss.xml", response_class=Response)
-async def rss_feed(
+def rss_feed(
+    request: Request,
     source: Optional[str] = Query(None, description="Filter by source"),
+    tag: Optional[str] = Query(None, description="Filter by tag"),
     days: int = Query(30, description="Events in next N days"),
+    session: Session = Depends(get_db),
 ):
-    """Generate RSS feed of events."""
-    
-    engine = get_engine()
-    session = get_session(engine)
-    
+    """RSS feed of events: the prebuilt feed when there is one, else rendered live."""
+    return response_cache.respond(
+        request, cache_key("rss", source, tag, days), session,
+        lambda: (load_feed(session, source, tag, days, "rss"), MEDIA_TYPES["rss"]),
+    )
+
+
+# Atom Feed
+@app.get("/atom.xml", response_class=Response)
+def atom_feed(
+    request: Request,
+    source: Optional[str] = Query(None, description="Filter by source"),
+    tag: Optional[str] = Query(None, description="Filter by tag"),
+    days: int = Query(30, description="Events in next N days"),
+    session: Session = Depends(get_db),
+):
+    """Atom version of /rss.xml."""
+    return response_cache.respond(
+        request, cache_key("atom", source, tag, days), session,
+        lambda: (load_feed(session, source, tag, days, "atom"), MEDIA_TYPES["atom"]),
+    )
+
+
+def encode_cursor(event: Event) -> str:
+    """Opaque cursor pointing just past `event` in (date, id) order."""
+    raw = json.dumps([event.date.isoformat(), event.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
     try:
-        # Relax start date filters to include today's events that might appear "past" in UTC vs Local
-        start_date = datetime.utcnow() - timedelta(hours=24)
-        end_date = datetime.utcnow() + timedelta(days=days)
-        
-        query = session.query(Event).filter(
-            Event.is_active == True,
-            Event.date >= start_date,
-            Event.date <= end_date
-        )
-        
-        if source:
-            query = query.filter(Event.source.ilike(f"%{source}%"))
-        
-        events = query.order_by(Event.date).limit(100).all()
-        
-        # Generate RSS
-        fg = FeedGenerator()
-        fg.title("Boston Events Aggregator")
-        fg.link(href="http://localhost:8000", rel="alternate")
-        fg.description("Tech, startup, and networking events in Boston/MA")
-        fg.language("en")
-        
-        # Ensure lastBuildDate is timezone aware
-        fg.lastBuildDate(datetime.utcnow().replace(tzinfo=pytz.UTC))
-        
-        for event in events:
-            fe = fg.add_entry()
-            fe.id(event.id)
-            fe.title(event.title)
-            fe.link(href=event.url)
-            fe.description(event.description or "")
-            
-            # Ensure published date is timezone aware
-            evt_date = event.date
-            if not evt_date.tzinfo:
-                evt_date = evt_date.replace(tzinfo=pytz.UTC)
-                
-            fe.published(evt_date)
-            
-            content = ""
-            if event.location:
-                content += f"📍 {event.location}<br/>"
-            if event.source:
-                content += f"🏷️ {event.source}<br/>"
-            if event.date:
-                content += f"📅 {event.date.strftime('%Y-%m-%d %H:%M')}<br/><br/>"
-            content += event.description or ""
-            
-            fe.content(content)
-        
-        rss_xml = fg.rss_str(pretty=True)
-        
-        return Response(
-            content=rss_xml,
-            media_type="application/rss+xml"
-        )
-    finally:
-        session.close()
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        date, event_id = json.loads(raw)
+        return datetime.fromisoformat(date), str(event_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# Totals change only when a scrape lands, so they are counted once per data
+# generation (and at most every TOTAL_CACHE_SECONDS) for each filter combination
+TOTAL_CACHE_SECONDS = 60
+_total_cache: dict[tuple, tuple[float, int]] = {}
+_total_lock = threading.Lock()  # handlers run in several threadpool workers
+
+
+def cached_total(key: tuple, query) -> int:
+    now = time.monotonic()
+    with _total_lock:
+        hit = _total_cache.get(key)
+    if hit and now - hit[0] < TOTAL_CACHE_SECONDS:
+        return hit[1]
+    total = query.order_by(None).count()
+    with _total_lock:
+        if len(_total_cache) > 1024:
+            _total_cache.clear()
+        _total_cache[key] = (now, total)
+    return total
+
 
 @app.get("/api/events")
-async def get_events(
+def get_events(
+    request: Request,
     source: Optional[str] = None,
+    tag: Optional[str] = None,
     days: int = 30,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces offset"),
+    include_total: bool = Query(True, description="Set to false to skip counting matches"),
+    session: Session = Depends(get_db),
 ):
-    """Get events as JSON."""
+    """
+    Get events as JSON, ordered by date.
+    
+    Page with `cursor` (the `next_cursor` of the previous response, null on
+    the last page): each page costs the same however deep it is. `offset`
+    still works but has to skip over every earlier row.
+    """
+    key = cache_key("events", source, tag, days, limit, None if cursor else offset, cursor, include_total)
+    return response_cache.respond(
+        request, key, session,
+        lambda: (
+            JSONResponse(list_events(session, source, tag, days, limit, offset, cursor, include_total)).body,
+            "application/json",
+        ),
+    )
+
+
+def list_events(
+    session: Session,
+    source: Optional[str],
+    tag: Optional[str],
+    days: int,
+    limit: int,
+    offset: int,
+    cursor: Optional[str],
+    include_total: bool,
+) -> dict:
+    query = session.query(Event).filter(
+        Event.is_active == True,
+        Event.date >= datetime.utcnow(),
+        Event.date <= datetime.utcnow() + timedelta(days=days)
+    )
     
-    engine = get_engine()
-    session = get_session(engine)
+    if source:
+        query = query.filter(Event.source.ilike(f"%{source}%"))
+    if tag:
+        query = filter_by_tag(query, tag)
     
-    try:
-        query = session.query(Event).filter(
-            Event.is_active == True,
-            Event.date >= datetime.utcnow(),
-            Event.date <= datetime.utcnow() + timedelta(days=days)
-        )
-        
+    if include_total:
+        generation, _ = response_cache.generation(session)
+        total = cached_total((generation, *cache_key("total", source, tag, days)), query)
+    else:
+        total = None
+    
+    query = query.order_by(Event.date, Event.id)
+    if cursor:
+        query = query.filter(tuple_(Event.date, Event.id) > decode_cursor(cursor))
+    elif offset:
+        query = query.offset(offset)
+    events = query.limit(limit + 1).all()
+    has_more = len(events) > limit
+    events = events[:limit]
+    
+    return {
+        "total": total,
+        "offset": None if cursor else offset,  # a cursor page has no offset
+        "limit": limit,
+        "next_cursor": encode_cursor(events[-1]) if has_more and events else None,
+        "events": [e.to_dict() for e in events]
+    }
+
+
+EXPORT_COLUMNS = [
+    "id", "title", "description", "date", "end_date", "location",
+    "url", "source", "image_url", "tags", "created_at",
+]
+EXPORT_BATCH_SIZE = 1000
+
+
+def export_rows(source: Optional[str], tag: Optional[str], start: datetime, end: Optional[datetime]):
+    """Yield export rows as dicts, in batches read through a server-side cursor."""
+    with session_scope() as session:
+        query = session.query(
+            Event.id, Event.title, Event.description, Event.date, Event.end_date, Event.location,
+            Event.url, Event.source, Event.image_url, Event.tags_json, Event.created_at,
+        ).filter(Event.is_active == True, Event.date >= start)
+        if end:
+            query = query.filter(Event.date <= end)
         if source:
             query = query.filter(Event.source.ilike(f"%{source}%"))
+        if tag:
+            query = filter_by_tag(query, tag)
         
-        total = query.count()
-        events = query.order_by(Event.date).offset(offset).limit(limit).all()
-        
-        return {
-            "total": total,
-            "offset": offset,
-            "limit": limit,
-            "events": [e.to_dict() for e in events]
-        }
-    finally:
-        session.close()
+        for row in query.order_by(Event.date, Event.id).yield_per(EXPORT_BATCH_SIZE):
+            values = list(row)
+            values[9] = orjson.loads(values[9] or "[]")
+            yield dict(zip(EXPORT_COLUMNS, values))
 
 
-@app.get("/api/sources")
-async def get_sources():
-    """Get list of event sources."""
+def stream_ndjson(rows):
+    chunk = []
+    for row in rows:
+        chunk.append(orjson.dumps(row))
+        if len(chunk) >= EXPORT_BATCH_SIZE:
+            yield b"\n".join(chunk) + b"\n"
+            chunk = []
+    if chunk:
+        yield b"\n".join(chunk) + b"\n"
+
+
+def stream_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for i, row in enumerate(rows, 1):
+        row["tags"] = ";".join(row["tags"])
+        writer.writerow([
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in (row[c] for c in EXPORT_COLUMNS)
+        ])
+        if i % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+@app.get("/api/events/export")
+def export_events(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    source: Optional[str] = None,
+    tag: Optional[str] = None,
+    start: Optional[datetime] = Query(None, description="Only events on or after this date (default: now)"),
+    end: Optional[datetime] = Query(None, description="Only events on or before this date"),
+    days: Optional[int] = Query(None, description="Only events in the next N days (when end is not given)"),
+):
+    """
+    Every matching event in one streamed response, one line per event.
     
-    engine = get_engine()
-    session = get_session(engine)
+    Rows are read and written in batches, so memory use does not grow with
+    the size of the export.
+    """
+    if start is None:
+        start = datetime.utcnow()
+    if end is None and days is not None:
+        end = start + timedelta(days=days)
     
-    try:
-        sources = session.query(
-            Event.source,
-        ).distinct().all()
-        
-        return {
-            "sources": [s[0] for s in sources]
-        }
-    finally:
-        session.close()
+    rows = export_rows(source, tag, start, end)
+    if format == "csv":
+        body, media_type = stream_csv(rows), "text/csv; charset=utf-8"
+    else:
+        body, media_type = stream_ndjson(rows), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="events.{format}"'},
+    )
 
 
-# Initialize templates
-templates = Jinja2Templates(directory="templates")
+@app.get("/api/search")
+def search(
+    q: str = Query(..., min_length=1, description="Words to look for in title, description and location"),
+    start: Optional[datetime] = Query(None, description="Only events on or after this date (default: today)"),
+    end: Optional[datetime] = Query(None, description="Only events on or before this date"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    session: Session = Depends(get_db),
+):
+    """Full-text search over events, best matches first."""
+    
+    if start is None:
+        start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    
+    total, results = full_text_search(session, q, start=start, end=end, limit=limit, offset=offset)
+    
+    return {
+        "query": q,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "results": [
+            {**r["event"].to_dict(), "rank": r["rank"], "snippet": r["snippet"]}
+            for r in results
+        ]
+    }
 
-# Web Interface
-@app.get("/", response_class=HTMLResponse)
-async def home(request: Request):
-    """Home page with event listing."""
+
+@app.get("/api/archive")
+def get_archived_events(
+    source: Optional[str] = None,
+    start: Optional[datetime] = Query(None, description="Only events on or after this date"),
+    end: Optional[datetime] = Query(None, description="Only events on or before this date"),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    session: Session = Depends(get_db),
+):
+    """Past events moved out of the listings by the retention job, newest first."""
     
-    engine = get_engine()
-    session = get_session(engine)
+    query = session.query(ArchivedEvent)
+    if source:
+        query = query.filter(ArchivedEvent.source.ilike(f"%{source}%"))
+    if start:
+        query = query.filter(ArchivedEvent.date >= start)
+    if end:
+        query = query.filter(ArchivedEvent.date <= end)
     
-    try:
-        # Get start of today (UTC) to ensure we show all events for today
-        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        events = session.query(Event).filter(
-            Event.is_active == True,
-            Event.date >= today
-        ).order_by(Event.date).limit(300).all()
-
-        # Calculate counts per source
-        source_counts = {}
-        for event in events:
-            source_counts[event.source] = source_counts.get(event.source, 0) + 1
-            
-        # Sort sources by count (descending)
-        sorted_sources = sorted(source_counts.items(), key=lambda x: x[1], reverse=True)
-        
-        return templates.TemplateResponse("index.html", {
-            "request": request, 
-            "events": events,
-            "sources": sorted_sources  # Pass list of (name, count) tuples
-        })
-    finally:
-        session.close()
+    total = query.count()
+    events = query.order_by(ArchivedEvent.date.desc()).offset(offset).limit(limit).all()
+    
+    return {
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "events": [e.to_dict() for e in events]
+    }
+
+
+@app.get("/api/sources")
+def get_sources(session: Session = Depends(get_db)):
+    """Get list of event sources, with the number of upcoming events of each."""
+    return {
+        "sources": source_names(session),
+        "counts": get_facets(session)["sources"],
+    }
+
+
+@app.get("/api/facets")
+def facet_counts(request: Request, session: Session = Depends(get_db)):
+    """
+    Upcoming event counts by source, tag, date bucket (today, the next 7 and
+    30 days) and type (online or in-person).
+    
+    Read from counters that ingest keeps up to date, so this costs the same
+    however many events there are.
+    """
+    return response_cache.respond(
+        request, ("facets",), session,
+        lambda: (JSONResponse(get_facets(session)).body, "application/json"),
+    )
+
+
+# Web Interface
+@app.get("/", response_class=HTMLResponse)
+def home(request: Request, session: Session = Depends(get_db)):
+    """Home page with event listing, served from the response cache."""
+    return response_cache.respond(
+        request, ("home",), session,
+        lambda: (render_home(session).encode(), "text/html; charset=utf-8"),
+    )
+
+
+def render_home(session: Session) -> str:
+    # Get start of today (UTC) to ensure we show all events for today
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    events = page_events(session, today)
+
+    # Chips count the cards on the page, sorted by count (descending); the
+    # page shows at most HOME_LIMIT of the upcoming events
+    source_counts = Counter(event.source for event in events)
+    total = get_facets(session, today.date())["total"]
+    return render_page(events, source_counts.most_common(), total)
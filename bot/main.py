@@ -8,7 +8,7 @@ from telegram.ext import ApplicationBuilder, ContextTypes, CommandHandler
 
 # Ensure we can import from parent directory
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from database import get_engine, get_session, Event
+from database import filter_by_tag, get_session, Event
 
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -24,6 +24,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "Try these commands:\n"
             "📅 /events - Get the next 5 upcoming events\n"
             "🗓️ /today - Events happening today\n"
+            "🏷️ /events ai - Only events tagged \"ai\" (works with /today too)\n"
             "💡 /help - Show available commands"
         ),
         parse_mode=ParseMode.MARKDOWN
@@ -35,27 +36,31 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         text=(
             "🤖 *Available Commands:*\n\n"
             "/start - Welcome message\n"
-            "/events - List next 10 upcoming events\n"
-            "/today - List events happening today\n"
+            "/events [tag] - List next 10 upcoming events\n"
+            "/today [tag] - List events happening today\n"
             "/help - Show this help message"
         ),
         parse_mode=ParseMode.MARKDOWN
     )
 
 async def events(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    engine = get_engine()
-    session = get_session(engine)
+    session = get_session()
+    
+    tag = " ".join(context.args) if context.args else None
     
     try:
-        events = session.query(Event).filter(
+        query = session.query(Event).filter(
             Event.is_active == True,
             Event.date >= datetime.utcnow()
-        ).order_by(Event.date).limit(10).all()
+        )
+        if tag:
+            query = filter_by_tag(query, tag)
+        events = query.order_by(Event.date).limit(10).all()
         
         if not events:
             await context.bot.send_message(
                 chat_id=update.effective_chat.id,
-                text="No upcoming events found in the database. 😔"
+                text=f"No upcoming events tagged \"{tag}\". 😔" if tag else "No upcoming events found in the database. 😔"
             )
             return
 
@@ -84,24 +89,28 @@ async def events(update: Update, context: ContextTypes.DEFAULT_TYPE):
         session.close()
 
 async def today(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    engine = get_engine()
-    session = get_session(engine)
+    session = get_session()
+    
+    tag = " ".join(context.args) if context.args else None
     
     try:
         now = datetime.utcnow()
         # Simple approximation for "today" - this assumes UTC, might need adjustment for EST
         # Ideally we convert query to local time, but for now we'll just show next 24h
         
-        events = session.query(Event).filter(
+        query = session.query(Event).filter(
             Event.is_active == True,
             Event.date >= now,
             Event.date <= now.replace(hour=23, minute=59, second=59)
-        ).order_by(Event.date).all()
+        )
+        if tag:
+            query = filter_by_tag(query, tag)
+        events = query.order_by(Event.date).all()
         
         if not events:
             await context.bot.send_message(
                 chat_id=update.effective_chat.id,
-                text="No events found for the rest of today. 🌙"
+                text=f"No events tagged \"{tag}\" for the rest of today. 🌙" if tag else "No events found for the rest of today. 🌙"
             )
             return
 
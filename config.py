@@ -0,0 +1,42 @@
+"""Loader for config.yaml with ${VAR} / ${VAR:-default} environment expansion."""
+
+import os
+import re
+from functools import lru_cache
+from typing import Optional
+
+import yaml
+
+CONFIG_PATH = os.getenv(
+    "CONFIG_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.yaml"),
+)
+
+_ENV_PATTERN = re.compile(r"\$\{(\w+)(?::-([^}]*))?\}")
+
+
+def _expand_env(value):
+    if isinstance(value, str):
+        return _ENV_PATTERN.sub(lambda m: os.getenv(m.group(1), m.group(2) or ""), value)
+    if isinstance(value, dict):
+        return {k: _expand_env(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_expand_env(v) for v in value]
+    return value
+
+
+@lru_cache(maxsize=None)
+def load_config(path: str = CONFIG_PATH) -> dict:
+    """Read config.yaml once and expand environment variables in it."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return _expand_env(yaml.safe_load(f) or {})
+
+
+def get_source_for_spider(spider_name: str) -> Optional[dict]:
+    """Return the `sources` entry whose `spider` matches, if any."""
+    for source in load_config().get("sources", []):
+        if source.get("spider") == spider_name:
+            return source
+    return None
@@ -0,0 +1,87 @@
+"""Shared Playwright browser for running several spiders in one process."""
+
+import asyncio
+import logging
+
+from scrapy.utils.defer import deferred_from_coro
+from scrapy_playwright.provider import PlaywrightBrowserProvider
+
+logger = logging.getLogger(__name__)
+
+# Process-wide state. Every crawler scheduled on the same CrawlerProcess runs
+# on one asyncio loop, so the Playwright driver and browser can be shared.
+_lock = None
+_playwright_cm = None
+_playwright = None
+_browser = None
+
+
+class _SharedBrowser:
+    """Proxy handed to each download handler.
+
+    Handlers close "their" browser when their crawler finishes; the shared
+    one has to outlive them, so that call is ignored here and the browser is
+    closed once at reactor shutdown instead.
+    """
+
+    def __init__(self, browser):
+        self._browser = browser
+
+    def __getattr__(self, name):
+        return getattr(self._browser, name)
+
+    async def close(self):
+        logger.debug("Keeping shared browser open for the remaining crawlers")
+
+
+async def close_shared_browser():
+    """Close the shared browser and stop the Playwright driver."""
+    global _playwright_cm, _playwright, _browser
+    if _browser is not None:
+        logger.info("Closing shared browser")
+        await _browser.close()
+        _browser = None
+    if _playwright_cm is not None:
+        await _playwright_cm.__aexit__()
+        _playwright_cm = None
+        _playwright = None
+
+
+class SharedBrowserProvider(PlaywrightBrowserProvider):
+    """Browser provider that reuses one Playwright driver and browser per process.
+
+    The first crawler that needs a browser launches it with its own
+    PLAYWRIGHT_LAUNCH_OPTIONS; later crawlers open their contexts in the same
+    browser instead of paying for a cold Chromium start.
+    """
+
+    async def start(self):
+        global _lock, _playwright_cm, _playwright
+        if _lock is None:
+            _lock = asyncio.Lock()
+        async with _lock:
+            if _playwright is None:
+                await super().start()
+                _playwright_cm = self.playwright_context_manager
+                _playwright = self.playwright
+
+                from twisted.internet import reactor
+                reactor.addSystemEventTrigger(
+                    "before", "shutdown", lambda: deferred_from_coro(close_shared_browser())
+                )
+        self.playwright_context_manager = None
+        self.playwright = _playwright
+        self.browser_type = getattr(_playwright, self.config.browser_type_name)
+
+    async def launch_browser(self):
+        global _browser
+        async with _lock:
+            if _browser is None or not _browser.is_connected():
+                _browser = await super().launch_browser()
+            else:
+                logger.info("Reusing shared %s browser", self.browser_type.name)
+        return _SharedBrowser(_browser)
+
+    async def close(self):
+        # The driver is shared with the other crawlers; see close_shared_browser().
+        pass
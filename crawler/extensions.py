@@ -0,0 +1,139 @@
+import json
+import logging
+from datetime import datetime, timezone
+
+from scrapy import signals
+
+from config import get_source_for_spider
+from database.facets import update_source_counts
+from database.models import Source, SyncLog, get_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlMetrics:
+    """
+    Records each crawl in sync_logs and updates its row in sources.
+
+    When the spider closes, the crawl stats are condensed into one SyncLog
+    row: the event counts kept by DatabasePipeline (events/*), elapsed time,
+    responses and bytes, time spent in Playwright downloads, listing pages
+    skipped as unchanged, dropped items and exceptions. The full stats dump
+    is stored alongside. The spider's Source row (matched by the `name` of
+    its config.yaml entry) gets last_scrape, last_success and last_error;
+    its event_count is kept by database/facets.py. scrape.py reads these
+    rows to build its report.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.Session = get_sessionmaker()
+        self.last_error = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        ext = cls(crawler.stats)
+        crawler.signals.connect(ext.response_received, signal=signals.response_received)
+        crawler.signals.connect(ext.spider_error, signal=signals.spider_error)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def response_received(self, response, request, spider):
+        if request.meta.get("playwright") and "download_latency" in request.meta:
+            self.stats.inc_value("playwright/render_count")
+            self.stats.inc_value("playwright/render_seconds", request.meta["download_latency"], start=0.0)
+
+    def spider_error(self, failure, response, spider):
+        self.last_error = f"{failure.type.__name__}: {failure.getErrorMessage()}"
+
+    def spider_closed(self, spider, reason):
+        stats = self.stats.get_stats()
+        finished_at = datetime.utcnow()
+        started_at = stats.get("start_time")
+        if started_at is None:
+            started_at = finished_at
+        elif started_at.tzinfo is not None:
+            started_at = started_at.astimezone(timezone.utc).replace(tzinfo=None)
+
+        exceptions = stats.get("spider_exceptions/count", 0) + sum(
+            value for key, value in stats.items()
+            if key.startswith("downloader/exception_type_count/")
+            and not key.endswith("IgnoreRequest")
+        )
+        found = stats.get("events/found", 0)
+        failed = stats.get("events/failed", 0)
+        status, error = self._status(reason, found, failed, exceptions)
+
+        log = SyncLog(
+            source=spider.name,
+            started_at=started_at,
+            finished_at=finished_at,
+            status=status,
+            events_found=found,
+            events_new=stats.get("events/new", 0),
+            events_updated=stats.get("events/updated", 0),
+            events_unchanged=stats.get("events/unchanged", 0),
+            duration_seconds=(finished_at - started_at).total_seconds(),
+            error_message=error,
+            response_count=stats.get("downloader/response_count", 0),
+            response_bytes=stats.get("downloader/response_bytes", 0),
+            render_seconds=round(stats.get("playwright/render_seconds", 0.0), 3),
+            pages_unchanged=stats.get("revalidation/hit", 0),
+            items_dropped=stats.get("item_dropped_count", 0),
+            exception_count=exceptions,
+            stats_json=json.dumps(stats, default=str, sort_keys=True),
+        )
+
+        session = self.Session()
+        try:
+            session.add(log)
+            self._update_source(session, spider, log)
+            session.commit()
+        except Exception as e:
+            logger.error(f"Error recording crawl metrics for {spider.name}: {e}")
+            session.rollback()
+        finally:
+            session.close()
+
+    def _status(self, reason, found, failed, exceptions):
+        """success / partial / error, plus an error message when not a success."""
+        if reason != "finished":
+            return "error", self.last_error or f"Spider closed: {reason}"
+        if failed and failed >= found:
+            return "error", f"{failed} events could not be saved"
+        if failed or exceptions:
+            parts = []
+            if failed:
+                parts.append(f"{failed} events could not be saved")
+            if exceptions:
+                parts.append(f"{exceptions} exceptions")
+            if self.last_error:
+                parts.append(f"last: {self.last_error}")
+            return "partial", "; ".join(parts)
+        return "success", None
+
+    def _update_source(self, session, spider, log):
+        config = get_source_for_spider(spider.name) or {}
+        name = config.get("name", spider.name)
+        source = session.query(Source).filter_by(name=name).first()
+        if source is None:
+            start_urls = getattr(spider, "start_urls", None) or [""]
+            source = Source(
+                name=name,
+                url=config.get("url", start_urls[0]),
+                parser=config.get("parser", spider.name),
+                enabled=config.get("enabled", True),
+            )
+            session.add(source)
+
+        # Events are stored under the spider's source_name, not the config name
+        source.event_source = getattr(spider, "source_name", None)
+        source.last_scrape = log.finished_at
+        if log.status == "error":
+            source.last_error = log.error_message
+        else:
+            source.last_success = log.finished_at
+            if log.status == "partial":
+                source.last_error = log.error_message
+        session.flush()
+        update_source_counts(session, {source.event_source or name})
@@ -3,11 +3,32 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
-from scrapy import signals
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import parse_qsl, urlencode, urlparse, urlsplit, urlunsplit
+
+from scrapy import Request, signals
+from scrapy.downloadermiddlewares.retry import get_retry_request
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.utils.misc import load_object
+from w3lib.url import canonicalize_url
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
 
+from config import get_source_for_spider
+from database.models import PageCache, get_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that only track where a link was clicked
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "aff", "tk"}
+
 
 class CrawlerSpiderMiddleware:
     # Not all methods need to be defined. If a method is not defined,
@@ -98,3 +119,604 @@ class CrawlerDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class PlaywrightRoutingMiddleware:
+    """
+    Sends only JS-dependent sources through Playwright.
+
+    A request that sets meta["playwright"] itself keeps that choice. Otherwise
+    the spider's `requires_js` attribute decides, then the `requires_js` flag
+    of its source in config.yaml. Spiders with neither default to Playwright.
+    Requests left with playwright=False are fetched by Scrapy's plain HTTP
+    handler, so no browser is started for them.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.requires_js = True
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        s = cls(crawler.stats)
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        return s
+
+    def process_request(self, request, spider):
+        if "playwright" not in request.meta:
+            request.meta["playwright"] = self.requires_js
+        transport = "playwright" if request.meta["playwright"] else "http"
+        self.stats.inc_value(f"routing/{transport}")
+        return None
+
+    def spider_opened(self, spider):
+        requires_js = getattr(spider, "requires_js", None)
+        if requires_js is None:
+            source = get_source_for_spider(spider.name)
+            requires_js = source.get("requires_js", True) if source else True
+        self.requires_js = bool(requires_js)
+        spider.logger.info(
+            "Routing requests via %s", "Playwright" if self.requires_js else "plain HTTP"
+        )
+
+
+class PlaywrightResourceBlockerMiddleware:
+    """
+    Aborts sub-resources that the spiders never read on Playwright pages.
+
+    Resource types in PLAYWRIGHT_BLOCKED_RESOURCE_TYPES and requests to hosts
+    in PLAYWRIGHT_BLOCKED_DOMAINS are aborted unless the host is listed in
+    PLAYWRIGHT_ALLOWED_DOMAINS. A spider can change any of these lists in its
+    custom_settings. The navigation request itself is never blocked.
+
+    Aborted requests are counted under playwright/blocked/* in the crawl
+    stats. The byte count is an estimate from PLAYWRIGHT_BLOCKED_BYTES_ESTIMATE,
+    since an aborted response is never downloaded.
+    """
+
+    def __init__(self, settings, stats):
+        self.stats = stats
+        self.enabled = settings.getbool("PLAYWRIGHT_BLOCK_RESOURCES", True)
+        self.blocked_types = set(settings.getlist("PLAYWRIGHT_BLOCKED_RESOURCE_TYPES"))
+        self.blocked_domains = tuple(settings.getlist("PLAYWRIGHT_BLOCKED_DOMAINS"))
+        self.allowed_domains = tuple(settings.getlist("PLAYWRIGHT_ALLOWED_DOMAINS"))
+        self.bytes_estimate = settings.getdict("PLAYWRIGHT_BLOCKED_BYTES_ESTIMATE")
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.settings, crawler.stats)
+
+    def process_request(self, request, spider):
+        if self.enabled and request.meta.get("playwright"):
+            request.meta.setdefault("playwright_page_init_callback", self.install_route)
+        return None
+
+    async def install_route(self, page, request):
+        # Registered after scrapy-playwright's own "**" route, so it runs first
+        # and hands everything it does not block back with route.fallback().
+        await page.route("**", self.handle_route)
+
+    async def handle_route(self, route, pw_request):
+        reason = self.block_reason(pw_request)
+        if reason is None:
+            await route.fallback()
+            return
+
+        await route.abort()
+        self.stats.inc_value("playwright/blocked/count")
+        self.stats.inc_value(f"playwright/blocked/{reason}")
+        self.stats.inc_value(
+            "playwright/blocked/bytes_estimated",
+            self.bytes_estimate.get(
+                pw_request.resource_type, self.bytes_estimate.get("default", 0)
+            ),
+        )
+
+    def block_reason(self, pw_request):
+        """Return why a browser request should be aborted, or None to let it through."""
+        if pw_request.is_navigation_request():
+            return None
+        host = urlparse(pw_request.url).hostname or ""
+        if _host_matches(host, self.allowed_domains):
+            return None
+        if pw_request.resource_type in self.blocked_types:
+            return f"resource_type/{pw_request.resource_type}"
+        if _host_matches(host, self.blocked_domains):
+            return "domain"
+        return None
+
+
+def _host_matches(host, domains):
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+class _ContextSlot:
+    """Bookkeeping for one pooled browser context."""
+
+    def __init__(self, name):
+        self.name = name
+        self.context = None
+        self.assigned = 0
+        self.pending = 0
+        self.pages = set()
+        self.retired = False
+        self.last_used = time.monotonic()
+
+    @property
+    def idle(self):
+        return not self.pages and not self.pending
+
+
+class PlaywrightContextPoolMiddleware:
+    """
+    Shares browser contexts per domain and recycles them.
+
+    Playwright requests that do not name a context in meta["playwright_context"]
+    are put in a context for their domain. After PLAYWRIGHT_CONTEXT_MAX_PAGES
+    pages that context is retired: new pages go to a fresh context and the old
+    one is closed once its last page is closed. Idle contexts beyond
+    PLAYWRIGHT_MAX_IDLE_CONTEXTS are closed as well. This keeps the number of
+    live contexts flat however many detail pages a crawl fans out to. Pages
+    per context are capped by scrapy-playwright's PLAYWRIGHT_MAX_PAGES_PER_CONTEXT.
+    """
+
+    def __init__(self, settings, stats):
+        self.stats = stats
+        self.max_pages = settings.getint("PLAYWRIGHT_CONTEXT_MAX_PAGES", 20)
+        self.max_idle = settings.getint("PLAYWRIGHT_MAX_IDLE_CONTEXTS", 2)
+        self.slots = {}
+        self.current = {}
+        self.generation = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.settings, crawler.stats)
+
+    def process_request(self, request, spider):
+        if not request.meta.get("playwright") or "playwright_context" in request.meta:
+            return None
+        if "_context_slot" in request.meta:
+            # Retried or redirected request: it already holds a place in a slot
+            return None
+
+        slot = self._slot_for(urlparse(request.url).hostname or "default")
+        slot.assigned += 1
+        slot.pending += 1
+        if slot.assigned >= self.max_pages:
+            slot.retired = True
+            self.stats.inc_value("playwright/context_pool/recycled")
+
+        request.meta["playwright_context"] = slot.name
+        request.meta["_context_slot"] = slot.name
+        request.meta["playwright_page_init_callback"] = self._make_init_callback(
+            slot, request.meta.get("playwright_page_init_callback")
+        )
+        return None
+
+    def process_response(self, request, response, spider):
+        self._release_pending(request)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        self._release_pending(request)
+        return None
+
+    def _slot_for(self, domain):
+        slot = self.slots.get(self.current.get(domain))
+        if slot is None or slot.retired:
+            self.generation += 1
+            slot = _ContextSlot(f"{domain}#{self.generation}")
+            self.slots[slot.name] = slot
+            self.current[domain] = slot.name
+        slot.last_used = time.monotonic()
+        return slot
+
+    def _make_init_callback(self, slot, original):
+        async def init_page(page, request):
+            if page not in slot.pages:
+                slot.context = page.context
+                slot.pages.add(page)
+                page.on("close", lambda _: self._page_closed(slot, page))
+            if not request.meta.get("_context_page_opened"):
+                request.meta["_context_page_opened"] = True
+                slot.pending -= 1
+            if original:
+                await load_object(original)(page, request)
+
+        return init_page
+
+    def _release_pending(self, request):
+        slot = self.slots.get(request.meta.get("_context_slot"))
+        if slot and not request.meta.get("_context_page_opened"):
+            # The download ended without a page ever being created
+            request.meta["_context_page_opened"] = True
+            slot.pending -= 1
+            self._maybe_close(slot)
+
+    def _page_closed(self, slot, page):
+        slot.pages.discard(page)
+        self._maybe_close(slot)
+
+    def _maybe_close(self, slot):
+        if not slot.idle:
+            return
+        if slot.retired:
+            self._close(slot)
+            return
+        idle = sorted(
+            (s for s in self.slots.values() if s.idle and not s.retired),
+            key=lambda s: s.last_used,
+        )
+        for stale in idle[: max(0, len(idle) - self.max_idle)]:
+            self.stats.inc_value("playwright/context_pool/closed_idle")
+            self._close(stale)
+
+    def _close(self, slot):
+        self.slots.pop(slot.name, None)
+        for domain, name in list(self.current.items()):
+            if name == slot.name:
+                del self.current[domain]
+        if slot.context is not None:
+            asyncio.ensure_future(self._close_context(slot.context))
+
+    async def _close_context(self, context):
+        try:
+            await context.close()
+        except Exception as e:
+            logger.debug(f"Closing browser context failed: {e}")
+
+
+class RevalidateStartRequestsMiddleware:
+    """
+    Marks start requests (the listing pages) for conditional revalidation.
+
+    Listings that hand the live Playwright page to the spider (meetup,
+    startupbos) are left out: their events are loaded by scrolling after the
+    first render, which the body hash cannot see.
+    """
+
+    async def process_start(self, start):
+        async for item_or_request in start:
+            if isinstance(item_or_request, Request) and not item_or_request.meta.get("playwright_include_page"):
+                item_or_request.meta.setdefault("revalidate", True)
+            yield item_or_request
+
+
+class RevalidationMiddleware:
+    """
+    Conditional revalidation for requests with meta["revalidate"] set.
+
+    The ETag, Last-Modified and a SHA-256 of the body of every such page are
+    kept in the page_cache table. Plain HTTP requests send them back as
+    If-None-Match / If-Modified-Since. A 304, or a body whose hash has not
+    changed, means the source is unchanged: the response is dropped with
+    IgnoreRequest, so the spider does not parse it and the pipeline writes
+    nothing. A page is still parsed at least every REVALIDATE_MAX_AGE_HOURS
+    (or meta["revalidate_max_age_hours"]) so that a failed run cannot hide it
+    for good. Hits and misses are counted
+    under revalidation/* in the crawl stats.
+
+    Requests with meta["playwright_include_page"] are never revalidated: the
+    spider reads more of the page than the first render (and must close the
+    page itself, which an IgnoreRequest would skip).
+    """
+
+    def __init__(self, stats, max_age_hours=24):
+        self.stats = stats
+        self.max_age = timedelta(hours=max_age_hours)
+        self.Session = get_sessionmaker()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("REVALIDATE_ENABLED", True):
+            raise NotConfigured
+        return cls(crawler.stats, crawler.settings.getfloat("REVALIDATE_MAX_AGE_HOURS", 24))
+
+    def process_request(self, request, spider):
+        if not request.meta.get("revalidate") or request.method != "GET":
+            return None
+        if request.meta.get("playwright_include_page"):
+            return None
+
+        key = request.meta.get("revalidate_key", request.url)
+        max_age = self.max_age
+        if "revalidate_max_age_hours" in request.meta:
+            max_age = timedelta(hours=request.meta["revalidate_max_age_hours"])
+        entry = self._load(key)
+        fresh = bool(entry and entry.parsed_at and datetime.utcnow() - entry.parsed_at < max_age)
+        request.meta["_revalidation"] = {
+            "key": key,
+            "content_hash": entry.content_hash if entry else None,
+            "fresh": fresh,
+        }
+        # A browser would render an empty page for a 304, so rendered pages
+        # are only compared by body hash
+        if fresh and not request.meta.get("playwright"):
+            if entry.etag:
+                request.headers.setdefault("If-None-Match", entry.etag)
+            if entry.last_modified:
+                request.headers.setdefault("If-Modified-Since", entry.last_modified)
+        return None
+
+    def process_response(self, request, response, spider):
+        state = request.meta.get("_revalidation")
+        if state is None:
+            return response
+
+        if response.status == 304 and state["fresh"]:
+            self.stats.inc_value("revalidation/not_modified")
+            unchanged = True
+            content_hash = state["content_hash"]
+        elif response.status == 200:
+            content_hash = hashlib.sha256(response.body).hexdigest()
+            unchanged = state["fresh"] and content_hash == state["content_hash"]
+        else:
+            return response
+
+        self._save(state["key"], response, content_hash, parsed=not unchanged)
+        if unchanged:
+            self.stats.inc_value("revalidation/hit")
+            raise IgnoreRequest(f"Unchanged since last crawl: {request.url}")
+        self.stats.inc_value("revalidation/miss")
+        return response
+
+    def _load(self, url):
+        session = self.Session()
+        try:
+            return session.get(PageCache, url)
+        finally:
+            session.close()
+
+    def _save(self, url, response, content_hash, parsed):
+        session = self.Session()
+        try:
+            entry = session.get(PageCache, url) or PageCache(url=url)
+            now = datetime.utcnow()
+            if response.status == 200:
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                entry.etag = etag.decode("latin-1") if etag else None
+                entry.last_modified = last_modified.decode("latin-1") if last_modified else None
+            entry.content_hash = content_hash
+            entry.checked_at = now
+            if parsed:
+                entry.parsed_at = now
+            session.add(entry)
+            session.commit()
+        except Exception as e:
+            logger.error(f"Error saving page cache entry for {url}: {e}")
+            session.rollback()
+        finally:
+            session.close()
+
+
+class IncrementalDetailMiddleware:
+    """
+    Skips detail pages that were fetched recently.
+
+    Applies to requests with meta["incremental"] set, i.e. the per-event
+    pages that fan-out spiders (startupbos, mass_founders) request from their
+    listings. Crawl state lives in page_cache under the page's canonical URL.
+    A page fetched less than INCREMENTAL_TTL_HOURS ago is not requested at all.
+    Older or unknown pages go through RevalidationMiddleware, so a stale page
+    costs a conditional request and is only parsed if it changed, or if it
+    was last parsed more than INCREMENTAL_MAX_AGE_HOURS ago.
+    """
+
+    def __init__(self, stats, ttl_hours=24, max_age_hours=168):
+        self.stats = stats
+        self.ttl = timedelta(hours=ttl_hours)
+        self.max_age_hours = max_age_hours
+        self.Session = get_sessionmaker()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            crawler.stats,
+            crawler.settings.getfloat("INCREMENTAL_TTL_HOURS", 24),
+            crawler.settings.getfloat("INCREMENTAL_MAX_AGE_HOURS", 168),
+        )
+
+    def process_request(self, request, spider):
+        if not request.meta.get("incremental") or "_revalidation" in request.meta:
+            return None
+
+        key = canonical_url(request.url)
+        session = self.Session()
+        try:
+            entry = session.get(PageCache, key)
+        finally:
+            session.close()
+
+        if entry and entry.checked_at and datetime.utcnow() - entry.checked_at < self.ttl:
+            self.stats.inc_value("incremental/skipped_fresh")
+            raise IgnoreRequest(f"Fetched within the last {self.ttl}: {request.url}")
+
+        self.stats.inc_value("incremental/stale" if entry else "incremental/new")
+        request.meta["revalidate"] = True
+        request.meta["revalidate_key"] = key
+        request.meta["revalidate_max_age_hours"] = self.max_age_hours
+        return None
+
+
+class _DomainState:
+    """Smoothed latency and error rate of one download slot."""
+
+    def __init__(self, concurrency):
+        self.concurrency = concurrency
+        self.latency = None
+        self.error_rate = 0.0
+        self.backoff = 0.0
+
+
+class AdaptiveThrottleMiddleware:
+    """
+    Per-domain concurrency and delay driven by latency and errors.
+
+    Every response updates an exponential moving average of the download
+    latency and error rate of its download slot (one per host). Hosts start
+    at CONCURRENT_REQUESTS_PER_DOMAIN; healthy ones are opened up one request
+    at a time up to ADAPTIVE_THROTTLE_MAX_CONCURRENCY
+    with a delay of latency / ADAPTIVE_THROTTLE_TARGET_CONCURRENCY. A 429 or
+    5xx halves the host's concurrency and doubles its backoff delay, which
+    then decays again as requests succeed.
+
+    Responses with a status in ADAPTIVE_THROTTLE_HTTP_CODES are retried up to
+    ADAPTIVE_THROTTLE_MAX_RETRIES times after a jittered exponential backoff,
+    or after Retry-After if the server sent a longer one. As with AutoThrottle,
+    the wait is applied as the slot's download delay: the retry is returned
+    at once and the downloader holds it, and every other request to that
+    host, until the delay has passed. When the wait would exceed
+    ADAPTIVE_THROTTLE_MAX_DELAY the response is passed on and dropped by
+    HttpErrorMiddleware instead of reaching the spider. Adjustments are
+    counted under throttle/* in the crawl stats.
+    """
+
+    EWMA_ALPHA = 0.3
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.start_concurrency = settings.getint("CONCURRENT_REQUESTS_PER_DOMAIN", 8)
+        self.max_concurrency = settings.getint("ADAPTIVE_THROTTLE_MAX_CONCURRENCY", 8)
+        self.target_concurrency = settings.getfloat("ADAPTIVE_THROTTLE_TARGET_CONCURRENCY", 4.0)
+        self.min_delay = settings.getfloat("DOWNLOAD_DELAY", 0.0)
+        self.max_delay = settings.getfloat("ADAPTIVE_THROTTLE_MAX_DELAY", 60.0)
+        self.base_backoff = settings.getfloat("ADAPTIVE_THROTTLE_BASE_BACKOFF", 2.0)
+        self.max_retries = settings.getint("ADAPTIVE_THROTTLE_MAX_RETRIES", 4)
+        self.error_threshold = settings.getfloat("ADAPTIVE_THROTTLE_ERROR_THRESHOLD", 0.1)
+        self.retry_codes = set(settings.getlist("ADAPTIVE_THROTTLE_HTTP_CODES"))
+        self.domains = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("ADAPTIVE_THROTTLE_ENABLED", True):
+            raise NotConfigured
+        return cls(crawler)
+
+    def process_response(self, request, response, spider):
+        key, slot = self._slot(request)
+        if slot is None:
+            return response
+        state = self._state(key)
+        self._observe_latency(state, request)
+
+        if response.status not in self.retry_codes:
+            self._on_success(key, state, slot)
+            return response
+
+        attempt = request.meta.get("retry_times", 0)
+        wait = self.base_backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+        retry_after = self._retry_after(response)
+        if retry_after is not None:
+            wait = max(wait, retry_after)
+        self._on_error(key, state, slot, wait)
+        self.stats.inc_value(f"throttle/status/{response.status}")
+
+        if wait > self.max_delay:
+            self.stats.inc_value("throttle/gave_up")
+            spider.logger.warning(
+                f"⏳ {key} asked us to wait {wait:.0f}s, giving up on {request.url}"
+            )
+            return response
+
+        retry = get_retry_request(
+            request,
+            spider=spider,
+            reason=f"throttle_{response.status}",
+            max_retry_times=self.max_retries,
+        )
+        if retry is None:
+            self.stats.inc_value("throttle/gave_up")
+            return response
+        self.stats.inc_value("throttle/retried")
+        return retry
+
+    def process_exception(self, request, exception, spider):
+        key, slot = self._slot(request)
+        if slot is not None and not isinstance(exception, IgnoreRequest):
+            state = self._state(key)
+            self._on_error(key, state, slot, None)
+        return None
+
+    def _state(self, key):
+        if key not in self.domains:
+            self.domains[key] = _DomainState(self.start_concurrency)
+        return self.domains[key]
+
+    def _slot(self, request):
+        key = request.meta.get("download_slot")
+        downloader = getattr(self.crawler.engine, "downloader", None)
+        if key is None or downloader is None:
+            return key, None
+        return key, downloader.slots.get(key)
+
+    def _observe_latency(self, state, request):
+        latency = request.meta.get("download_latency")
+        if latency is None:
+            return
+        if state.latency is None:
+            state.latency = latency
+        else:
+            state.latency += self.EWMA_ALPHA * (latency - state.latency)
+
+    def _on_success(self, key, state, slot):
+        state.error_rate *= 1 - self.EWMA_ALPHA
+        state.backoff = state.backoff / 2 if state.backoff > 0.1 else 0.0
+        if state.error_rate < self.error_threshold and state.concurrency < self.max_concurrency:
+            state.concurrency += 1
+        self._apply(state, slot)
+
+    def _on_error(self, key, state, slot, wait):
+        state.error_rate += self.EWMA_ALPHA * (1 - state.error_rate)
+        state.backoff = min(self.max_delay, max(state.backoff * 2, self.base_backoff))
+        if wait is not None:
+            state.backoff = min(self.max_delay, max(state.backoff, wait))
+        if state.concurrency > 1:
+            state.concurrency = max(1, state.concurrency // 2)
+            self.stats.inc_value("throttle/concurrency_reduced")
+        self._apply(state, slot)
+        logger.info(
+            f"🐢 Throttling {key}: concurrency={slot.concurrency} "
+            f"delay={slot.delay:.1f}s error_rate={state.error_rate:.2f}"
+        )
+
+    def _apply(self, state, slot):
+        # Slots are garbage-collected when idle, so the state lives here and
+        # is copied onto whichever slot object is current
+        slot.concurrency = state.concurrency
+        delay = self.min_delay
+        if state.latency is not None:
+            delay = max(delay, state.latency / self.target_concurrency)
+        slot.delay = min(self.max_delay, max(delay, state.backoff))
+
+    @staticmethod
+    def _retry_after(response):
+        """Seconds from a Retry-After header (delta-seconds or HTTP date)."""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        value = value.decode("latin-1").strip()
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def canonical_url(url):
+    """Normalize a URL for crawl state: no fragment, tracking params or trailing slash."""
+    parts = urlsplit(canonicalize_url(url))
+    query = urlencode([
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.startswith("utm_") and k not in TRACKING_PARAMS
+    ])
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme, parts.netloc.lower(), path, query, ""))
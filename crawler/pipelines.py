@@ -1,55 +1,138 @@
 import logging
-import hashlib
 import json
 from datetime import datetime
-from sqlalchemy.orm import sessionmaker
-from database.models import get_engine, Event
+from twisted.internet import task
+from database.dedup import merge_duplicates
+from database.models import event_fingerprint, get_sessionmaker, make_event_id, sync_events
+from tagging_utils import suggest_tags
+
+
+def event_id(item):
+    """Stable event ID: hash of title, start date and source."""
+    return make_event_id(item['title'], item['date'], item['source'])
+
+
+def event_row(item):
+    """Map a scraped EventItem to an `events` table row."""
+    now = datetime.utcnow()
+    # Spider tags first, then keyword categories from the text
+    tags = list(item.get('tags') or [])
+    tags += [t for t in suggest_tags(item['title'], item.get('description', '')) if t not in tags]
+    row = {
+        'id': event_id(item),
+        'title': item['title'],
+        'description': item.get('description', ''),
+        'date': item['date'],
+        'end_date': item.get('end_date'),
+        'location': item.get('location', ''),
+        'url': item['url'],
+        'source': item['source'],
+        'image_url': item.get('image_url'),
+        'tags_json': json.dumps(tags),
+        'is_active': True,
+        'created_at': now,
+        'updated_at': now,
+    }
+    row['content_hash'] = event_fingerprint(row)
+    return row
+
 
 class DatabasePipeline:
-    def __init__(self):
-        engine = get_engine()
-        self.Session = sessionmaker(bind=engine)
+    """
+    Buffers scraped events and writes them as multi-row upserts.
+
+    The buffer is flushed when it holds DB_BATCH_SIZE events, every
+    DB_FLUSH_INTERVAL seconds, and when the spider closes. Each spider keeps
+    one session open for the whole crawl. Events another source already
+    lists are merged into that event (see database/dedup.py), and events
+    whose content hash matches the stored one are not written.
+    New/updated/unchanged/merged/failed counts are kept in the crawl stats
+    under events/*, where CrawlMetrics picks them up for the run's SyncLog row.
+    """
+
+    def __init__(self, stats, batch_size=100, flush_interval=30.0):
+        self.Session = get_sessionmaker()
+        self.stats = stats
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.session = None
+        self.buffer = {}
+        self.flush_loop = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            crawler.stats,
+            batch_size=crawler.settings.getint("DB_BATCH_SIZE", 100),
+            flush_interval=crawler.settings.getfloat("DB_FLUSH_INTERVAL", 30.0),
+        )
+
+    def open_spider(self, spider):
+        self.session = self.Session()
+        if self.flush_interval > 0:
+            self.flush_loop = task.LoopingCall(self.flush, spider)
+            self.flush_loop.start(self.flush_interval, now=False)
+
+    def close_spider(self, spider):
+        if self.flush_loop and self.flush_loop.running:
+            self.flush_loop.stop()
+        try:
+            self.flush(spider)
+        finally:
+            self.session.close()
 
     def process_item(self, item, spider):
-        session = self.Session()
         try:
-            # Generate ID
-            unique_string = f"{item['title']}|{item['date'].isoformat()}|{item['source']}"
-            item_id = hashlib.sha256(unique_string.encode()).hexdigest()[:16]
-            
-            # Prepare data
-            event_dict = {
-                'id': item_id,
-                'title': item['title'],
-                'description': item.get('description', ''),
-                'date': item['date'],
-                'end_date': item.get('end_date'),
-                'location': item.get('location', ''),
-                'url': item['url'],
-                'source': item['source'],
-                'image_url': item.get('image_url'),
-                'tags_json': json.dumps(item.get('tags', [])),
-                'updated_at': datetime.utcnow()
-            }
-            
-            # Upsert
-            existing = session.query(Event).filter_by(id=item_id).first()
-            if existing:
-                for key, value in event_dict.items():
-                    if key != 'id':
-                        setattr(existing, key, value)
-                logging.info(f"Updated event: {item['title']}")
-            else:
-                new_event = Event(**event_dict)
-                session.add(new_event)
-                logging.info(f"New event: {item['title']}")
-            
-            session.commit()
-            return item
-            
+            row = event_row(item)
         except Exception as e:
             logging.error(f"Error saving item: {e}")
-            session.rollback()
             return item
-        finally:
-            session.close()
+
+        # Same ID twice in one batch would make the upsert touch a row twice
+        self.stats.inc_value('events/found')
+        self.buffer[row['id']] = row
+        if len(self.buffer) >= self.batch_size:
+            self.flush(spider)
+        return item
+
+    def flush(self, spider):
+        """Write all buffered events in one transaction."""
+        if not self.buffer:
+            return
+        rows = list(self.buffer.values())
+        self.buffer.clear()
+
+        try:
+            unique = merge_duplicates(self.session, rows)
+            counts = sync_events(self.session, unique)
+            counts['merged'] = len(rows) - len(unique)
+            self.session.commit()
+            self._count(counts)
+            logging.info(
+                f"Saved events for {spider.name}: {counts['new']} new, "
+                f"{counts['updated']} updated, {counts['unchanged']} unchanged, "
+                f"{counts['merged']} merged into other sources' events"
+            )
+        except Exception as e:
+            logging.error(f"Batch upsert of {len(rows)} events failed, retrying one by one: {e}")
+            self.session.rollback()
+            self._flush_rows_individually(rows)
+
+    def _flush_rows_individually(self, rows):
+        # Each row is checked against the ones committed before it, so
+        # duplicates within the batch are still merged
+        for row in rows:
+            try:
+                unique = merge_duplicates(self.session, [row])
+                counts = sync_events(self.session, unique)
+                counts['merged'] = 1 - len(unique)
+                self.session.commit()
+                self._count(counts)
+            except Exception as e:
+                logging.error(f"Error saving item: {e}")
+                self.session.rollback()
+                self.stats.inc_value('events/failed')
+
+    def _count(self, counts):
+        for key, value in counts.items():
+            self.stats.inc_value(f'events/{key}', value)
@@ -8,29 +8,132 @@ ROBOTSTXT_OBEY = False
 
 # Scrapy-Playwright Config
 # Dowload Handlers
+# The Playwright handler only renders requests with meta["playwright"] set;
+# everything else goes through Scrapy's plain HTTP/1.1 handler.
 DOWNLOAD_HANDLERS = {
     "http": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
     "https": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
 }
 
+# Start requests are the listing pages; mark them for revalidation
+SPIDER_MIDDLEWARES = {
+    "crawler.middlewares.RevalidateStartRequestsMiddleware": 550,
+}
+
+# Sets meta["playwright"] from each source's `requires_js` in config.yaml,
+# skips detail pages fetched recently and listing pages that have not
+# changed since the last crawl, aborts
+# images/fonts/media and trackers on rendered pages, and pools browser
+# contexts per domain. AdaptiveThrottleMiddleware sits after RetryMiddleware
+# (550) so it sees 429/5xx responses first.
+DOWNLOADER_MIDDLEWARES = {
+    "crawler.middlewares.PlaywrightRoutingMiddleware": 50,
+    "crawler.middlewares.IncrementalDetailMiddleware": 53,
+    "crawler.middlewares.RevalidationMiddleware": 55,
+    "crawler.middlewares.PlaywrightResourceBlockerMiddleware": 60,
+    "crawler.middlewares.PlaywrightContextPoolMiddleware": 70,
+    "crawler.middlewares.AdaptiveThrottleMiddleware": 560,
+}
+
 PLAYWRIGHT_LAUNCH_OPTIONS = {
     "headless": True,
     "timeout": 60 * 1000,  # 60 seconds
 }
 
+# Resource blocking (PlaywrightResourceBlockerMiddleware)
+# Spiders can override any of these lists in custom_settings.
+PLAYWRIGHT_BLOCK_RESOURCES = True
+PLAYWRIGHT_BLOCKED_RESOURCE_TYPES = ["image", "media", "font"]
+PLAYWRIGHT_BLOCKED_DOMAINS = [
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "facebook.net",
+    "connect.facebook.net",
+    "hotjar.com",
+    "segment.io",
+    "segment.com",
+    "mixpanel.com",
+    "fullstory.com",
+    "intercom.io",
+    "hs-scripts.com",
+    "hs-analytics.net",
+    "clarity.ms",
+    "sentry.io",
+    "newrelic.com",
+    "nr-data.net",
+    "ads.linkedin.com",
+    "snap.licdn.com",
+    "ads-twitter.com",
+]
+PLAYWRIGHT_ALLOWED_DOMAINS = []
+# Rough per-request sizes used for playwright/blocked/bytes_estimated
+PLAYWRIGHT_BLOCKED_BYTES_ESTIMATE = {
+    "image": 60_000,
+    "media": 500_000,
+    "font": 40_000,
+    "script": 50_000,
+    "default": 10_000,
+}
+
+# Context/page pooling (PlaywrightContextPoolMiddleware)
+# At most this many open pages per context...
+PLAYWRIGHT_MAX_PAGES_PER_CONTEXT = 4
+# ...a domain's context is replaced after serving this many pages...
+PLAYWRIGHT_CONTEXT_MAX_PAGES = 20
+# ...and only this many idle contexts are kept around for reuse.
+PLAYWRIGHT_MAX_IDLE_CONTEXTS = 2
+
 # Browser Context
 PLAYWRIGHT_CONTEXT_ARGS = {
     "viewport": {"width": 1920, "height": 1080},
     "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
 }
 
+# Conditional revalidation of listing pages (RevalidationMiddleware).
+# Unchanged pages are still re-parsed once they are this old.
+REVALIDATE_ENABLED = True
+REVALIDATE_MAX_AGE_HOURS = 24
+
+# Detail pages (meta["incremental"]) fetched within this window are skipped;
+# older ones are revalidated and re-parsed at least once per max age
+INCREMENTAL_TTL_HOURS = 24
+INCREMENTAL_MAX_AGE_HOURS = 168
+
+# Records every crawl in sync_logs and the spider's row in sources
+EXTENSIONS = {
+    "crawler.extensions.CrawlMetrics": 500,
+}
+
 # Pipelines
 ITEM_PIPELINES = {
    "crawler.pipelines.DatabasePipeline": 300,
 }
 
+# DatabasePipeline buffering: flush after this many items or seconds
+DB_BATCH_SIZE = 100
+DB_FLUSH_INTERVAL = 30
+
 # Concurrency
 CONCURRENT_REQUESTS = 16
+# Starting point per host; AdaptiveThrottleMiddleware moves it between 1 and
+# ADAPTIVE_THROTTLE_MAX_CONCURRENCY
+CONCURRENT_REQUESTS_PER_DOMAIN = 2
+
+# Per-domain throttling and backoff (AdaptiveThrottleMiddleware)
+ADAPTIVE_THROTTLE_ENABLED = True
+ADAPTIVE_THROTTLE_MAX_CONCURRENCY = 8
+# Delay per host is latency / this while the host is healthy
+ADAPTIVE_THROTTLE_TARGET_CONCURRENCY = 4.0
+ADAPTIVE_THROTTLE_MAX_DELAY = 60
+ADAPTIVE_THROTTLE_BASE_BACKOFF = 2
+ADAPTIVE_THROTTLE_MAX_RETRIES = 4
+ADAPTIVE_THROTTLE_ERROR_THRESHOLD = 0.1
+ADAPTIVE_THROTTLE_HTTP_CODES = [429, 500, 502, 503, 504, 522, 524]
+# RetryMiddleware keeps timeouts and connection errors; the codes above are
+# retried with backoff instead of immediately
+RETRY_HTTP_CODES = [408]
 
 # Logging
 LOG_LEVEL = 'INFO'
@@ -40,4 +143,5 @@ TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
 FEED_EXPORT_ENCODING = "utf-8"
 
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-HTTPERROR_ALLOWED_CODES = [403, 404, 429, 500]
+# 429/5xx that are still failing after backoff are dropped, not parsed
+HTTPERROR_ALLOWED_CODES = [403, 404]
@@ -4,29 +4,21 @@ from crawler.items import EventItem
 
 class BostonChamberSpider(scrapy.Spider):
     name = "boston_chamber"
+    source_name = "Boston Chamber"  # Event.source of its items
     start_urls = ["https://bostonchamber.com/event/calendar/"]
 
     def start_requests(self):
         for url in self.start_urls:
-            yield scrapy.Request(
-                url,
-                meta={
-                    "playwright": True,
-                    "playwright_include_page": True,
-                }
-            )
+            yield scrapy.Request(url)
 
     async def parse(self, response):
-        page = response.meta["playwright_page"]
-        await page.close()
-        
         # Use verified selector from debug HTML
         events = response.css('.fwpl-result')
         self.logger.info(f"Found {len(events)} events")
         
         for event in events:
             item = EventItem()
-            item['source'] = "Boston Chamber"
+            item['source'] = self.source_name
             item['tags'] = ['business', 'chamber']
             
             item['title'] = event.css('.event_title h6::text').get('').strip()
@@ -5,6 +5,7 @@ from crawler.items import EventItem
 
 class EventbriteSpider(scrapy.Spider):
     name = "eventbrite"
+    source_name = "Eventbrite"  # Event.source of its items
     start_urls = ["https://www.eventbrite.com/d/ma--boston/all-events/"]
 
     def start_requests(self):
@@ -13,14 +14,10 @@ class EventbriteSpider(scrapy.Spider):
                 url,
                 meta=dict(
                     playwright=True,
-                    playwright_include_page=True,
                 )
             )
 
     async def parse(self, response):
-        page = response.meta["playwright_page"]
-        await page.close()
-
         # Strategy 1: JSON-LD
         found_json = False
         scripts = response.xpath('//script[@type="application/ld+json"]/text()').getall()
@@ -46,7 +43,7 @@ class EventbriteSpider(scrapy.Spider):
 
     def _parse_json_event(self, data):
         item = EventItem()
-        item['source'] = "Eventbrite"
+        item['source'] = self.source_name
         item['tags'] = ['eventbrite']
         
         item['title'] = data.get('name')
@@ -4,6 +4,7 @@ from crawler.items import EventItem
 
 class HarvardInnovationSpider(scrapy.Spider):
     name = "harvard_innovation"
+    source_name = "Harvard i-lab"  # Event.source of its items
     start_urls = ["https://innovationlabs.harvard.edu/events/upcoming"]
 
     def start_requests(self):
@@ -12,14 +13,10 @@ class HarvardInnovationSpider(scrapy.Spider):
                 url,
                 meta={
                     "playwright": True,
-                    "playwright_include_page": True,
                 }
             )
 
     async def parse(self, response):
-        page = response.meta["playwright_page"]
-        await page.close()
-        
         # Selectors for Harvard i-lab
         # Based on debug HTML: li.event-tease
         events = response.css('li.event-tease')
@@ -27,7 +24,7 @@ class HarvardInnovationSpider(scrapy.Spider):
         
         for event in events:
             item = EventItem()
-            item['source'] = "Harvard i-lab"
+            item['source'] = self.source_name
             item['tags'] = ['harvard', 'innovation']
             
             # Title
@@ -5,6 +5,7 @@ from scrapy_playwright.page import PageMethod
 
 class HbsAbSpider(scrapy.Spider):
     name = "hbsab"
+    source_name = "HBS Alumni Boston"  # Event.source of its items
     start_urls = ["https://www.hbsab.org/s/1738/cc/21/page.aspx?sid=1738&gid=8&pgid=13&cid=664"]
 
     custom_settings = {
@@ -21,8 +22,6 @@ class HbsAbSpider(scrapy.Spider):
                     'Accept-Language': 'en-US,en;q=0.9',
                 },
                 meta={
-                    "playwright": True,
-                    "playwright_include_page": True,
                     "playwright_context_kwargs": {
                         "viewport": {"width": 1920, "height": 1080},
                         "java_script_enabled": True,
@@ -31,9 +30,6 @@ class HbsAbSpider(scrapy.Spider):
             )
 
     async def parse(self, response):
-        page = response.meta["playwright_page"]
-        await page.close()
-        
         if True:
             self.logger.info("Dumping HTML to hbsab_debug.html")
             with open("hbsab_debug.html", "w", encoding="utf-8") as f:
@@ -47,7 +43,7 @@ class HbsAbSpider(scrapy.Spider):
         
         for event in events:
             item = EventItem()
-            item['source'] = "HBS Alumni Boston"
+            item['source'] = self.source_name
             item['tags'] = ['hbs', 'business']
             
             # Title: The <a> tag has a span.sr-only then the text.
@@ -4,22 +4,14 @@ from crawler.items import EventItem
 
 class LabCentralSpider(scrapy.Spider):
     name = "lab_central"
+    source_name = "LabCentral"  # Event.source of its items
     start_urls = ["https://www.labcentral.org/events-and-media/events"]
 
     def start_requests(self):
         for url in self.start_urls:
-            yield scrapy.Request(
-                url,
-                meta={
-                    "playwright": True,
-                    "playwright_include_page": True,
-                }
-            )
+            yield scrapy.Request(url)
 
     async def parse(self, response):
-        page = response.meta["playwright_page"]
-        await page.close()
-        
         # Selectors for LabCentral
         # Events are <a> tags in a grid
         events = response.css('div.grid a[href*="/events/"]')
@@ -27,7 +19,7 @@ class LabCentralSpider(scrapy.Spider):
         
         for event in events:
             item = EventItem()
-            item['source'] = "LabCentral"
+            item['source'] = self.source_name
             item['tags'] = ['biotech', 'labcentral']
             
             # Title: It seems the title is in a <p> tag directly inside the <a> or in an h3
@@ -5,6 +5,7 @@ from scrapy_playwright.page import PageMethod
 
 class LumaSpider(scrapy.Spider):
     name = "luma"
+    source_name = "Luma"  # Event.source of its items
     start_urls = ["https://luma.com/boston"]
 
     def start_requests(self):
@@ -13,7 +14,6 @@ class LumaSpider(scrapy.Spider):
                 url,
                 meta=dict(
                     playwright=True,
-                    playwright_include_page=True,
                     playwright_page_methods=[
                          # Wait for the timeline to load
                         PageMethod("wait_for_selector", ".timeline-section"),
@@ -25,9 +25,6 @@ class LumaSpider(scrapy.Spider):
             )
 
     async def parse(self, response):
-        page = response.meta["playwright_page"]
-        await page.close()
-
         # Iterate over timeline sections
         for section in response.css('.timeline-section'):
             # Extract date header "Dec 10", "Today"
@@ -42,7 +39,7 @@ class LumaSpider(scrapy.Spider):
             # Iterate over cards in this section
             for card in section.css('.content-card'):
                 item = EventItem()
-                item['source'] = "Luma"
+                item['source'] = self.source_name
                 item['tags'] = ['luma', 'tech']
                 item['location'] = "Boston, MA" # Default
 
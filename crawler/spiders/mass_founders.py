@@ -4,22 +4,14 @@ from crawler.items import EventItem
 
 class MassFoundersSpider(scrapy.Spider):
     name = "mass_founders"
+    source_name = "Mass Founders Network"  # Event.source of its items
     start_urls = ["https://massfoundersnetwork.org/calendar-embed/v3gJc1MPW7e/embed/"]
 
     def start_requests(self):
         for url in self.start_urls:
-            yield scrapy.Request(
-                url,
-                meta={
-                    "playwright": True,
-                    "playwright_include_page": True,
-                }
-            )
+            yield scrapy.Request(url)
 
     async def parse(self, response):
-        page = response.meta["playwright_page"]
-        await page.close()
-        
         # Extract event links from the list
         # detailed view usually has links like https://massfoundersnetwork.org/event/...
         event_links = response.css('a[href*="/event/"]::attr(href)').getall()
@@ -27,17 +19,12 @@ class MassFoundersSpider(scrapy.Spider):
         self.logger.info(f"Found {len(event_links)} event links")
         
         for link in set(event_links):
-             yield scrapy.Request(link, callback=self.parse_event, meta=dict(
-                 playwright=True,
-                 playwright_include_page=True,
-             ))
+             # Only new or stale event pages are fetched again
+             yield scrapy.Request(link, callback=self.parse_event, meta={"incremental": True})
 
     async def parse_event(self, response):
-        page = response.meta["playwright_page"]
-        await page.close()
-
         item = EventItem()
-        item['source'] = "Mass Founders Network"
+        item['source'] = self.source_name
         item['tags'] = ['founders', 'massachusetts']
         item['url'] = response.url
         item['title'] = response.css('h1::text').get('').strip()
@@ -6,6 +6,7 @@ from scrapy_playwright.page import PageMethod
 
 class MeetupSpider(scrapy.Spider):
     name = "meetup"
+    source_name = "Meetup"  # Event.source of its items
     start_urls = ["https://www.meetup.com/find/?location=us--ma--boston&source=EVENTS&categoryId=546"]
 
     def start_requests(self):
@@ -47,7 +48,7 @@ class MeetupSpider(scrapy.Spider):
 
         for event in events:
             item = EventItem()
-            item['source'] = "Meetup"
+            item['source'] = self.source_name
             item['tags'] = ['meetup', 'tech']
             
             # Title & URL
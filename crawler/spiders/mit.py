@@ -5,6 +5,7 @@ from scrapy_playwright.page import PageMethod
 
 class MitSpider(scrapy.Spider):
     name = "mit"
+    source_name = "MIT Entrepreneurship"  # Event.source of its items
     start_urls = ["https://entrepreneurship.mit.edu/events-calendar/"]
 
     def start_requests(self):
@@ -12,8 +13,6 @@ class MitSpider(scrapy.Spider):
             yield scrapy.Request(
                 url,
                 meta=dict(
-                    playwright=True,
-                    playwright_include_page=True,
                     playwright_page_methods=[
                         PageMethod("wait_for_selector", "#orbit-events .card"),
                     ],
@@ -21,9 +20,6 @@ class MitSpider(scrapy.Spider):
             )
 
     async def parse(self, response):
-        page = response.meta["playwright_page"]
-        await page.close()
-
         cards = response.css('#orbit-events .card')
         if not cards:
             self.logger.warning("No cards found with primary selector")
@@ -32,7 +28,7 @@ class MitSpider(scrapy.Spider):
         
         for card in cards:
             item = EventItem()
-            item['source'] = "MIT Entrepreneurship"
+            item['source'] = self.source_name
             item['tags'] = ['mit', 'entrepreneurship']
             
             # Title
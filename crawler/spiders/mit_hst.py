@@ -4,22 +4,14 @@ from crawler.items import EventItem
 
 class MitHstSpider(scrapy.Spider):
     name = "mit_hst"
+    source_name = "MIT HST"  # Event.source of its items
     start_urls = ["https://hst.mit.edu/news-events/events-academic-calendar"]
 
     def start_requests(self):
         for url in self.start_urls:
-            yield scrapy.Request(
-                url,
-                meta={
-                    "playwright": True,
-                    "playwright_include_page": True,
-                }
-            )
+            yield scrapy.Request(url)
 
     async def parse(self, response):
-        page = response.meta["playwright_page"]
-        await page.close()
-        
         # Selectors for MIT HST Events (Drupal)
         # Based on debug HTML: article.node--event inside div.views-row
         events = response.css('article.node--event')
@@ -27,7 +19,7 @@ class MitHstSpider(scrapy.Spider):
         
         for event in events:
             item = EventItem()
-            item['source'] = "MIT HST"
+            item['source'] = self.source_name
             item['tags'] = ['mit', 'hst', 'science']
             
             # Title
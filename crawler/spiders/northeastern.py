@@ -4,28 +4,20 @@ from crawler.items import EventItem
 
 class NortheasternAlumniSpider(scrapy.Spider):
     name = "northeastern_alumni"
+    source_name = "Northeastern Alumni"  # Event.source of its items
     start_urls = ["https://alumni.northeastern.edu/events/"]
 
     def start_requests(self):
         for url in self.start_urls:
-            yield scrapy.Request(
-                url,
-                meta={
-                    "playwright": True,
-                    "playwright_include_page": True,
-                }
-            )
+            yield scrapy.Request(url)
 
     async def parse(self, response):
-        page = response.meta["playwright_page"]
-        await page.close()
-        
         events = response.css('.event-item')
         self.logger.info(f"Found {len(events)} events")
         
         for event in events:
             item = EventItem()
-            item['source'] = "Northeastern Alumni"
+            item['source'] = self.source_name
             item['tags'] = ['northeastern', 'alumni']
             
             # Title & URL
@@ -4,22 +4,14 @@ from crawler.items import EventItem
 
 class SloanSpider(scrapy.Spider):
     name = "sloan"
+    source_name = "MIT Sloan"  # Event.source of its items
     start_urls = ["https://sloangroups.mit.edu/events"]
 
     def start_requests(self):
         for url in self.start_urls:
-            yield scrapy.Request(
-                url,
-                meta={
-                    "playwright": True,
-                    "playwright_include_page": True,
-                }
-            )
+            yield scrapy.Request(url)
 
     async def parse(self, response):
-        page = response.meta["playwright_page"]
-        await page.close()
-        
         # CampusGroups structure (from previous HTML read)
         # It seems the list is loaded dynamically or in a standardized list
         # "### [[[eventName]](...)]" suggests structured rendering.
@@ -35,7 +27,7 @@ class SloanSpider(scrapy.Spider):
 
         for event in events:
             item = EventItem()
-            item['source'] = "MIT Sloan"
+            item['source'] = self.source_name
             item['tags'] = ['mit', 'sloan', 'business']
             
             # If grabbing h3 directly
@@ -1,12 +1,16 @@
 
 import scrapy
+import json
 from datetime import datetime
 import re
 from crawler.items import EventItem
+from scrapy.exceptions import IgnoreRequest
 from scrapy.utils.project import get_project_settings
+from scrapy_playwright.page import PageMethod
 
 class StartupBosSpider(scrapy.Spider):
     name = "startupbos"
+    source_name = "Startup Boston"  # Event.source of its items
     start_urls = ["https://www.startupbos.org/directory/events"]
     
     custom_settings = {
@@ -22,6 +26,8 @@ class StartupBosSpider(scrapy.Spider):
             yield scrapy.Request(
                 url,
                 meta={
+                    # Listed as static in config.yaml, but the event links only
+                    # show up after scrolling the rendered page
                     "playwright": True,
                     "playwright_include_page": True,
                     "playwright_context_kwargs": {
@@ -81,11 +87,22 @@ class StartupBosSpider(scrapy.Spider):
                             callback=self.parse_external_event,
                             meta={
                                 "playwright": True,
-                                "playwright_include_page": True, # Needed for LD+JSON extraction via Playwright
+                                # Only new or stale event pages are rendered again
+                                "incremental": True,
+                                # LD+JSON is read from the rendered HTML, no page handle needed
+                                "playwright_page_methods": [
+                                    PageMethod(
+                                        "wait_for_selector",
+                                        'script[type="application/ld+json"]',
+                                        state="attached",
+                                        timeout=10000,
+                                    ),
+                                ],
                                 "playwright_context_kwargs": {
                                     "viewport": {"width": 1920, "height": 1080},
                                 }
-                            }
+                            },
+                            errback=self.external_event_failed,
                         )
                         found_count += 1
 
@@ -100,31 +117,17 @@ class StartupBosSpider(scrapy.Spider):
         """
         Parses an event page (Luma or Eventbrite) to extract details via LD+JSON.
         """
-        page = response.meta["playwright_page"]
-        
         try:
             url = response.url
             self.logger.info(f"Scraping External Event: {url}")
             
-            # Luma / Eventbrite specific wait
-            try:
-                # Wait for JSON-LD script or title using a state check
-                # Note: 'attached' state is default for wait_for_selector
-                await page.wait_for_selector('script[type="application/ld+json"]', timeout=10000)
-            except:
-                self.logger.warning("Wait for LD+JSON timed out, trying to extract anyway.")
-            
             # Extract LD+JSON
-            ld_json_list = await page.evaluate("""() => {
-                const scripts = document.querySelectorAll('script[type="application/ld+json"]');
-                return Array.from(scripts).map(s => {
-                    try {
-                        return JSON.parse(s.innerText);
-                    } catch (e) {
-                        return null;
-                    }
-                }).filter(i => i);
-            }""")
+            ld_json_list = []
+            for script in response.css('script[type="application/ld+json"]::text').getall():
+                try:
+                    ld_json_list.append(json.loads(script))
+                except ValueError:
+                    continue
             
             event_data = None
             
@@ -144,7 +147,7 @@ class StartupBosSpider(scrapy.Spider):
                 self.logger.info(f"Found LD+JSON Event Data for {url}")
                 
                 item = EventItem()
-                item['source'] = "Startup Boston" 
+                item['source'] = self.source_name
                 item['title'] = event_data.get('name')
                 item['url'] = url
                 item['description'] = event_data.get('description', '') or ""
@@ -183,5 +186,10 @@ class StartupBosSpider(scrapy.Spider):
                     
         except Exception as e:
             self.logger.error(f"Error parsing external event {response.url}: {e}")
-        finally:
-            await page.close()
+
+    def external_event_failed(self, failure):
+        if failure.check(IgnoreRequest):
+            # Skipped on purpose (unchanged or recently fetched page), not a failure
+            return
+        # Usually the LD+JSON wait timing out on a page without event data
+        self.logger.warning(f"External event request failed: {failure.request.url} ({failure.value})")
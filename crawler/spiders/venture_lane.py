@@ -4,22 +4,14 @@ from crawler.items import EventItem
 
 class VentureLaneSpider(scrapy.Spider):
     name = "venture_lane"
+    source_name = "Venture Lane"  # Event.source of its items
     start_urls = ["https://theventurelane.com/programs-events/"]
 
     def start_requests(self):
         for url in self.start_urls:
-            yield scrapy.Request(
-                url,
-                meta={
-                    "playwright": True,
-                    "playwright_include_page": True,
-                }
-            )
+            yield scrapy.Request(url)
 
     async def parse(self, response):
-        page = response.meta["playwright_page"]
-        await page.close()
-        
         if True:
             self.logger.info("Dumping HTML to venturelane_debug.html")
             with open("venturelane_debug.html", "w", encoding="utf-8") as f:
@@ -31,7 +23,7 @@ class VentureLaneSpider(scrapy.Spider):
         
         for event in events:
             item = EventItem()
-            item['source'] = "Venture Lane"
+            item['source'] = self.source_name
             item['tags'] = ['startup', 'venturelane']
             
             # Title
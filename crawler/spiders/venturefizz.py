@@ -6,6 +6,7 @@ from crawler.items import EventItem
 
 class VentureFizzSpider(scrapy.Spider):
     name = "venturefizz"
+    source_name = "VentureFizz"  # Event.source of its items
     start_urls = ["https://venturefizz.com/events/"]
 
     def start_requests(self):
@@ -13,8 +14,6 @@ class VentureFizzSpider(scrapy.Spider):
             yield scrapy.Request(
                 url,
                 meta=dict(
-                    playwright=True,
-                    playwright_include_page=True,
                     playwright_page_methods=[
                         PageMethod("wait_for_selector", "article.tribe-events-calendar-list__event"),
                     ],
@@ -22,12 +21,9 @@ class VentureFizzSpider(scrapy.Spider):
             )
 
     async def parse(self, response):
-        page = response.meta["playwright_page"]
-        await page.close()
-
         for card in response.css('article.tribe-events-calendar-list__event'):
             item = EventItem()
-            item['source'] = "VentureFizz"
+            item['source'] = self.source_name
             item['tags'] = ['tech', 'boston']
 
             # Title & URL
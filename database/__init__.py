@@ -3,21 +3,63 @@
 from .models import (
     Base,
     Event,
+    EventTag,
+    EventSource,
+    ArchivedEvent,
     Source,
     SyncLog,
+    PageCache,
     Subscriber,
+    DataGeneration,
+    EventFacet,
+    get_db,
     get_engine,
+    get_scoped_session,
     get_session,
+    get_sessionmaker,
+    resolve_database_url,
+    session_scope,
     init_db,
+    maintain_db,
+    bump_generation,
+    event_fingerprint,
+    make_event_id,
+    filter_by_tag,
+    get_generation,
+    normalize_tag,
+    set_event_tags,
+    sync_events,
+    upsert_events,
 )
 
 __all__ = [
     'Base',
     'Event',
+    'EventTag',
+    'EventSource',
+    'ArchivedEvent',
     'Source',
     'SyncLog',
+    'PageCache',
     'Subscriber',
+    'DataGeneration',
+    'EventFacet',
+    'get_db',
     'get_engine',
+    'get_scoped_session',
     'get_session',
+    'get_sessionmaker',
+    'resolve_database_url',
+    'session_scope',
     'init_db',
+    'maintain_db',
+    'bump_generation',
+    'event_fingerprint',
+    'make_event_id',
+    'filter_by_tag',
+    'get_generation',
+    'normalize_tag',
+    'set_event_tags',
+    'sync_events',
+    'upsert_events',
 ]
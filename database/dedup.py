@@ -0,0 +1,287 @@
+"""Cross-source near-duplicate detection at ingest.
+
+The same event is often listed by several sources (a Luma event re-scraped
+through Startup Boston, a search result for an event a spider already has).
+Their IDs hash title, date and source, so every copy would get its own row.
+
+Before a batch is written, each event is compared with the active events of
+other sources on the same day, already stored or earlier in the batch:
+
+* Titles are normalized (case, accents, punctuation, filler words) and
+  shingled into character 3-grams; venues into word sets.
+* Blocking: only events on the same day (or starting within
+  DATE_TOLERANCE) are ever compared.
+* MinHash signatures of the title shingles are split into LSH bands, so only
+  events sharing a band on the same day become candidate pairs.
+* Candidates are confirmed on the exact title Jaccard similarity, plus the
+  venue or start time for titles that are merely similar. Listings at
+  different venues, or with start times more than DATE_TOLERANCE apart, are
+  never merged, however alike their titles.
+
+A duplicate is not written as an event. Its source and URL are recorded in
+event_sources under the canonical event (the one seen first), and a stored
+copy from before is deactivated.
+"""
+
+import hashlib
+import logging
+import random
+import re
+import unicodedata
+from collections import defaultdict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import and_, or_, select, update
+
+from .facets import facet_snapshot, is_online, update_facets
+from .models import Event, EventSource, bump_generation
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 32
+BANDS = 16  # of NUM_PERM // BANDS rows each; catches >99% of pairs at 0.6 similarity
+TITLE_DUPLICATE = 0.8  # title similarity that is enough on its own
+TITLE_SIMILAR = 0.6  # ... that is enough with a matching venue or start time
+VENUE_MATCH = 0.5
+DATE_TOLERANCE = timedelta(hours=6)
+
+_FILLER_WORDS = {
+    'a', 'an', 'and', 'at', 'by', 'for', 'in', 'of', 'on', 'the', 'to', 'with',
+    'boston', 'event', 'events', 'meetup', 'ma',
+}
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240101)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+
+def _words(text: Optional[str]) -> list[str]:
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode().lower()
+    return re.findall(r'[a-z0-9]+', text)
+
+
+def normalize_title(title: Optional[str]) -> str:
+    """Lowercase ASCII words of the title without filler words or years."""
+    return ' '.join(
+        w for w in _words(title)
+        if w not in _FILLER_WORDS and not re.fullmatch(r'(19|20)\d\d', w)
+    )
+
+
+def normalize_venue(location: Optional[str]) -> frozenset:
+    return frozenset(w for w in _words(location) if w not in _FILLER_WORDS)
+
+
+def shingles(text: str, k: int = 3) -> frozenset:
+    if len(text) <= k:
+        return frozenset([text]) if text else frozenset()
+    return frozenset(text[i:i + k] for i in range(len(text) - k + 1))
+
+
+def minhash(items: frozenset) -> tuple:
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), 'big') for s in items]
+    if not hashes:
+        return ()
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+@lru_cache(maxsize=65536)
+def title_signature(title: Optional[str]) -> tuple[frozenset, tuple]:
+    """Shingles and MinHash signature of a title; cached across batches."""
+    items = shingles(normalize_title(title))
+    return items, minhash(items)
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class _Listing:
+    __slots__ = ('id', 'source', 'url', 'date', 'title', 'venue', 'online', 'signature')
+
+    def __init__(self, row: dict):
+        self.id = row['id']
+        self.source = row['source']
+        self.url = row['url']
+        self.date = row['date']
+        self.title, self.signature = title_signature(row['title'])
+        self.venue = normalize_venue(row.get('location'))
+        self.online = is_online(row.get('location'))
+
+    def bands(self):
+        rows = NUM_PERM // BANDS
+        for band in range(BANDS):
+            yield band, self.signature[band * rows:(band + 1) * rows]
+
+    def similarity(self, other: '_Listing') -> float:
+        """Title similarity if `other` is the same event, else 0."""
+        if self.source == other.source:
+            return 0.0
+        same_day = self.date.date() == other.date.date()
+        if not same_day and abs(self.date - other.date) > DATE_TOLERANCE:
+            return 0.0
+        similarity = jaccard(self.title, other.title)
+        if similarity < TITLE_SIMILAR:
+            return 0.0
+        # However alike the titles, two venues or start times mean two events
+        # (a series, or the same talk given twice); online listings name no venue
+        if self.venue and other.venue and not self.online and not other.online and not self.venue & other.venue:
+            return 0.0
+        # Date-only listings sit at midnight, which says nothing about the time
+        timed = self.date.time() != datetime.min.time() and other.date.time() != datetime.min.time()
+        if timed and abs(self.date - other.date) > DATE_TOLERANCE:
+            return 0.0
+        if similarity >= TITLE_DUPLICATE:
+            return similarity
+        same_start = timed and self.date == other.date
+        if same_start or jaccard(self.venue, other.venue) >= VENUE_MATCH:
+            return similarity
+        return 0.0
+
+
+class DuplicateIndex:
+    """LSH index over listings, bucketed by day and signature band."""
+
+    def __init__(self):
+        self.buckets = defaultdict(list)
+
+    def _keys(self, listing: _Listing, days=(0,)):
+        for offset in days:
+            day = listing.date.date() + timedelta(days=offset)
+            for band, values in listing.bands():
+                yield day, band, values
+
+    def add(self, listing: _Listing) -> None:
+        for key in self._keys(listing):
+            self.buckets[key].append(listing)
+
+    def match(self, listing: _Listing) -> Optional[_Listing]:
+        """The indexed listing that `listing` duplicates most closely, if any."""
+        if not listing.signature:
+            return None
+        best, best_score = None, 0.0
+        seen = {listing.id}
+        # Neighbouring days too, for start times within DATE_TOLERANCE of midnight
+        for key in self._keys(listing, days=(0, -1, 1)):
+            for candidate in self.buckets.get(key, ()):
+                if candidate.id in seen:
+                    continue
+                seen.add(candidate.id)
+                score = listing.similarity(candidate)
+                if score > best_score:
+                    best, best_score = candidate, score
+        return best
+
+
+def _day_spans(days: list) -> list[tuple[datetime, datetime]]:
+    """Merge the given days, each widened by one day either side, into ranges."""
+    spans = []
+    for day in sorted(days):
+        start = datetime.combine(day - timedelta(days=1), datetime.min.time())
+        end = datetime.combine(day + timedelta(days=2), datetime.min.time())
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+    return spans
+
+
+def _load_stored(session, listings: list[_Listing], index: DuplicateIndex) -> None:
+    spans = _day_spans({l.date.date() for l in listings})
+    query = session.query(
+        Event.id, Event.source, Event.url, Event.date, Event.title, Event.location,
+    ).filter(
+        Event.is_active == True,
+        or_(*[and_(Event.date >= start, Event.date < end) for start, end in spans]),
+    )
+    sources = {l.source for l in listings}
+    if len(sources) == 1:
+        # Events of the batch's own source can never be its duplicates
+        query = query.filter(Event.source != next(iter(sources)))
+    for row in query:
+        index.add(_Listing(row._asdict()))
+
+
+def find_duplicates(session, rows: list[dict]) -> dict:
+    """
+    Map the ID of each row that duplicates another event to that event's ID.
+
+    Rows are matched against stored active events and against earlier rows
+    of the same batch. Rows need id, source, url, date, title and location.
+    """
+    listings = [_Listing(row) for row in rows if row.get('date') and row.get('title')]
+    if not listings:
+        return {}
+
+    index = DuplicateIndex()
+    _load_stored(session, listings, index)
+    duplicates = {}
+    for listing in listings:
+        canonical = index.match(listing)
+        if canonical is None:
+            index.add(listing)
+        else:
+            duplicates[listing.id] = canonical.id
+    return duplicates
+
+
+def merge_duplicates(session, rows: list[dict]) -> list[dict]:
+    """
+    Drop rows that duplicate another event and record them as its sources.
+
+    Returns the rows still to be written. Nothing is committed.
+    """
+    duplicates = find_duplicates(session, rows)
+    if not duplicates:
+        return rows
+
+    now = datetime.utcnow()
+    links = {}
+    for row in rows:
+        canonical_id = duplicates.get(row['id'])
+        if canonical_id is not None:
+            links[(canonical_id, row['url'])] = {
+                'event_id': canonical_id, 'url': row['url'], 'source': row['source'],
+                'duplicate_id': row['id'], 'first_seen': now, 'last_seen': now,
+            }
+    _upsert_links(session, list(links.values()))
+    # Copies stored before they were recognized as duplicates. Ones merged on
+    # an earlier crawl are inactive already, and re-merging them changes nothing
+    stored = list(session.scalars(
+        select(Event.id).where(Event.id.in_(list(duplicates)), Event.is_active == True)
+    ))
+    if stored:
+        before = facet_snapshot(session, stored)
+        session.execute(
+            update(Event).where(Event.id.in_(stored), Event.is_active == True).values(is_active=False),
+            execution_options={'synchronize_session': False},
+        )
+        update_facets(session, stored, before)
+        bump_generation(session)
+    logger.info(f"Merged {len(duplicates)} duplicate listings into existing events")
+    return [row for row in rows if row['id'] not in duplicates]
+
+
+def _upsert_links(session, links: list[dict]) -> None:
+    dialect = session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        for link in links:
+            session.merge(EventSource(**link))
+        return
+
+    stmt = insert(EventSource.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['event_id', 'url'],
+        set_={'source': stmt.excluded.source, 'last_seen': stmt.excluded.last_seen},
+    )
+    session.execute(stmt, links)
@@ -0,0 +1,189 @@
+"""Facet counts of active events, kept up to date at write time.
+
+event_facets holds one counter per (facet, value, day): how many active
+events on that day carry that source, tag or type (online or in-person).
+Every write path adjusts them by the difference it made:
+
+* sync_events() and merge_duplicates() take a facet_snapshot() of the
+  events they are about to write and call update_facets() afterwards;
+* the retention job subtracts the events it archives.
+
+Reading the facets is then a scan of the counters from today on, however
+many events there are; get_facets() sums them into upcoming counts per
+source, tag, date bucket and type. Counters are per day so that they never
+need adjusting as time passes. Source.event_count holds the upcoming count
+of each source.
+
+recompute_facets() rebuilds everything from the events table. The scheduler
+runs it every few hours to repair any drift (e.g. rows changed by hand).
+"""
+
+import json
+import logging
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select, update
+
+from .models import Event, EventFacet, Source, normalize_tag
+
+logger = logging.getLogger(__name__)
+
+ONLINE_WORDS = ('online', 'remote', 'zoom', 'webinar')
+DATE_BUCKETS = {'today': 1, 'week': 7, 'month': 30}  # days, counting today
+
+_FACET_COLUMNS = (Event.source, Event.date, Event.location, Event.tags_json)
+
+
+def is_online(location: Optional[str]) -> bool:
+    """Same rule as the cards on the listing page."""
+    location = (location or '').lower()
+    return not location or any(word in location for word in ONLINE_WORDS)
+
+
+def event_facets(source: str, when: datetime, location: Optional[str], tags_json: Optional[str]) -> list[tuple]:
+    """The (facet, value, day) counters one active event adds to."""
+    day = when.date()
+    keys = [
+        ('source', source, day),
+        ('type', 'online' if is_online(location) else 'in-person', day),
+    ]
+    try:
+        tags = json.loads(tags_json or '[]')
+    except ValueError:
+        tags = []
+    keys.extend(('tag', tag, day) for tag in {normalize_tag(t) for t in tags} if tag)
+    return keys
+
+
+def facet_snapshot(conn, ids: list[str]) -> Counter:
+    """Counter contributions of the events with these IDs, as stored now."""
+    counts = Counter()
+    for start in range(0, len(ids), 900):
+        query = select(*_FACET_COLUMNS).where(Event.id.in_(ids[start:start + 900]), Event.is_active == True)
+        for row in conn.execute(query):
+            counts.update(event_facets(*row))
+    return counts
+
+
+def update_facets(conn, ids: list[str], before: Counter) -> None:
+    """Apply the change to events `ids` since facet_snapshot() returned `before`."""
+    after = facet_snapshot(conn, ids)
+    delta = {key: after[key] - before[key] for key in before.keys() | after.keys()}
+    apply_delta(conn, {key: n for key, n in delta.items() if n})
+
+
+def apply_delta(conn, delta: dict) -> None:
+    """Add `delta` ({(facet, value, day): n}) to the counters. Nothing is committed."""
+    if not delta:
+        return
+    rows = [
+        {'facet': facet, 'value': value, 'day': day, 'count': n}
+        for (facet, value, day), n in delta.items()
+    ]
+    table = EventFacet.__table__
+    dialect = conn.get_bind().dialect.name if hasattr(conn, 'get_bind') else conn.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        stmt = upsert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['facet', 'value', 'day'],
+            set_={'count': table.c.count + stmt.excluded['count']},
+        )
+        for start in range(0, len(rows), 400):
+            conn.execute(stmt, rows[start:start + 400])
+    else:
+        for row in rows:
+            result = conn.execute(
+                update(table)
+                .where(table.c.facet == row['facet'], table.c.value == row['value'], table.c.day == row['day'])
+                .values(count=table.c.count + row['count'])
+            )
+            if not result.rowcount:
+                conn.execute(insert(table).values(**row))
+    conn.execute(delete(table).where(table.c.count <= 0))
+    update_source_counts(conn, {value for (facet, value, _) in delta if facet == 'source'})
+
+
+def update_source_counts(conn, names: Optional[set] = None) -> None:
+    """
+    Set Source.event_count to the upcoming count of the given Event.source
+    values (default: all sources).
+
+    A Source row is named after its config.yaml entry; its events carry the
+    spider's source_name, recorded as Source.event_source.
+    """
+    if names is not None and not names:
+        return
+    facets = EventFacet.__table__
+    sources = Source.__table__
+    event_source = func.coalesce(sources.c.event_source, sources.c.name)
+    upcoming = (
+        select(func.coalesce(func.sum(facets.c.count), 0))
+        .where(
+            facets.c.facet == 'source',
+            facets.c.value == event_source,
+            facets.c.day >= datetime.utcnow().date(),
+        )
+        .scalar_subquery()
+    )
+    stmt = update(sources).values(event_count=upcoming)
+    if names is not None:
+        stmt = stmt.where(event_source.in_(list(names)))
+    conn.execute(stmt)
+
+
+def recompute_facets(conn) -> int:
+    """Rebuild every counter from the events table; returns how many there are."""
+    counts = Counter()
+    for row in conn.execute(select(*_FACET_COLUMNS).where(Event.is_active == True)):
+        counts.update(event_facets(*row))
+
+    table = EventFacet.__table__
+    conn.execute(delete(table))
+    rows = [
+        {'facet': facet, 'value': value, 'day': day, 'count': n}
+        for (facet, value, day), n in counts.items()
+    ]
+    for start in range(0, len(rows), 400):
+        conn.execute(insert(table), rows[start:start + 400])
+    update_source_counts(conn)
+    return len(rows)
+
+
+def _ranked(counts: Counter) -> dict:
+    return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+
+def get_facets(conn, today: Optional[date] = None) -> dict:
+    """Upcoming (from the start of `today`) event counts by source, tag, date bucket and type."""
+    today = today or datetime.utcnow().date()
+    table = EventFacet.__table__
+    facets = {'source': Counter(), 'tag': Counter(), 'type': Counter()}
+    dates = dict.fromkeys(DATE_BUCKETS, 0)
+    query = select(table.c.facet, table.c.value, table.c.day, table.c.count).where(table.c.day >= today)
+    for facet, value, day, count in conn.execute(query):
+        facets[facet][value] += count
+        if facet == 'type':
+            # Every event has exactly one type, so these sum to events per day
+            for bucket, days in DATE_BUCKETS.items():
+                if day < today + timedelta(days=days):
+                    dates[bucket] += count
+    return {
+        'total': sum(facets['type'].values()),
+        'sources': _ranked(facets['source']),
+        'tags': _ranked(facets['tag']),
+        'dates': dates,
+        'types': {'in-person': facets['type']['in-person'], 'online': facets['type']['online']},
+    }
+
+
+def source_names(conn) -> list[str]:
+    """Sources with at least one active event, past or upcoming."""
+    table = EventFacet.__table__
+    query = select(table.c.value).where(table.c.facet == 'source').distinct().order_by(table.c.value)
+    return list(conn.execute(query).scalars())
@@ -0,0 +1,124 @@
+"""In-place schema upgrades for existing databases.
+
+`create_all` only creates missing tables, so an events.db made by an older
+version never gains new columns or indexes. `upgrade()` runs after it on
+every `init_db()`:
+
+1. Columns and indexes declared on the models but missing from the database
+   are added (ALTER TABLE ... ADD COLUMN / CREATE INDEX).
+2. Numbered steps in MIGRATIONS that have not run yet are applied in order
+   and recorded in the schema_migrations table. Use them for anything the
+   models cannot express, such as dropping an index or backfilling data.
+
+Both are idempotent, so a fresh database just records every step as done.
+"""
+
+import json
+import logging
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+
+from .facets import recompute_facets
+from .models import Base, EventTag, normalize_tag
+from .search import create_search_index
+
+logger = logging.getLogger(__name__)
+
+_metadata = MetaData()
+schema_migrations = Table(
+    'schema_migrations', _metadata,
+    Column('version', Integer, primary_key=True),
+    Column('name', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+
+def _drop_index_if_exists(conn, name: str):
+    conn.execute(text(f'DROP INDEX IF EXISTS {name}'))
+
+
+def _drop_single_column_event_indexes(conn):
+    # Superseded by ix_events_active_date and ix_events_source_date
+    _drop_index_if_exists(conn, 'ix_events_is_active')
+    _drop_index_if_exists(conn, 'ix_events_source')
+
+
+def _backfill_event_tags(conn):
+    links = set()
+    for event_id, tags_json in conn.execute(text('SELECT id, tags_json FROM events')):
+        try:
+            tags = json.loads(tags_json or '[]')
+        except ValueError:
+            continue
+        links.update((event_id, normalize_tag(tag)) for tag in tags if normalize_tag(tag))
+    conn.execute(EventTag.__table__.delete())
+    rows = [{'event_id': event_id, 'tag': tag} for event_id, tag in links]
+    for start in range(0, len(rows), 400):
+        conn.execute(EventTag.__table__.insert(), rows[start:start + 400])
+
+
+def _drop_active_date_index(conn):
+    # Superseded by ix_events_active_date_id, which also covers the id tiebreak
+    _drop_index_if_exists(conn, 'ix_events_active_date')
+
+
+MIGRATIONS = [
+    (1, 'drop single-column event indexes', _drop_single_column_event_indexes),
+    (2, 'fill event_tags from events.tags_json', _backfill_event_tags),
+    (3, 'full-text index over title, description and location', create_search_index),
+    (4, 'replace ix_events_active_date with ix_events_active_date_id', _drop_active_date_index),
+    (5, 'fill event_facets from events', recompute_facets),
+]
+
+
+def add_missing_columns(engine):
+    """ALTER existing tables to add columns that were added to the models."""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            present = {c['name'] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in present:
+                    col_type = column.type.compile(dialect=engine.dialect)
+                    logger.info(f"Adding column {table.name}.{column.name}")
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'))
+
+
+def create_missing_indexes(engine):
+    """Create indexes declared on the models that the database lacks."""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            present = {ix['name'] for ix in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in present:
+                    logger.info(f"Creating index {index.name}")
+                    index.create(conn)
+
+
+def run_migrations(engine):
+    """Apply numbered migrations that are not yet recorded as applied."""
+    _metadata.create_all(engine)
+    with engine.begin() as conn:
+        applied = {version for (version,) in conn.execute(select(schema_migrations.c.version))}
+    for version, name, step in MIGRATIONS:
+        if version in applied:
+            continue
+        with engine.begin() as conn:
+            logger.info(f"Applying migration {version}: {name}")
+            step(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=version, name=name, applied_at=datetime.utcnow(),
+            ))
+
+
+def upgrade(engine):
+    """Bring an existing database up to the current models."""
+    add_missing_columns(engine)
+    create_missing_indexes(engine)
+    run_migrations(engine)
@@ -1,19 +1,32 @@
 """Database models for Boston Events Aggregator."""
 
+import hashlib
 import json
+import logging
+import os
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional
-from sqlalchemy import Column, String, DateTime, Text, Boolean, Integer, create_engine
+from functools import lru_cache
+from typing import Iterator, Optional
+from sqlalchemy import Column, String, Date, DateTime, Text, Boolean, Integer, Float, ForeignKey, Index, create_engine, delete, event, insert, select, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, relationship, scoped_session, sessionmaker
 
 Base = declarative_base()
+logger = logging.getLogger(__name__)
 
 
 class Event(Base):
     """Event model representing a single event from any source."""
     
     __tablename__ = 'events'
+    __table_args__ = (
+        # Every listing filters on is_active + a date range and orders by
+        # (date, id), which is also the keyset /api/events pages on
+        Index('ix_events_active_date_id', 'is_active', 'date', 'id'),
+        Index('ix_events_source_date', 'source', 'date'),
+    )
     
     id = Column(String(64), primary_key=True)  # SHA256 hash
     title = Column(String(500), nullable=False)
@@ -21,17 +34,30 @@ class Event(Base):
     date = Column(DateTime, nullable=False, index=True)
     end_date = Column(DateTime)
     location = Column(String(500))
-    url = Column(String(1000), nullable=False)
-    source = Column(String(100), nullable=False, index=True)
+    url = Column(String(1000), nullable=False, index=True)
+    source = Column(String(100), nullable=False)
     image_url = Column(String(1000))
     tags_json = Column(Text, default='[]')
+    content_hash = Column(String(64))  # event_fingerprint() of the scraped fields
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    is_active = Column(Boolean, default=True, index=True)
+    is_active = Column(Boolean, default=True)
+    
+    # Normalized copy of tags_json for filtering; see set_event_tags()
+    tag_links = relationship('EventTag', cascade='all, delete-orphan', passive_deletes=True)
+    # Listings of the same event on other sources, merged by dedup.py
+    source_links = relationship(
+        'EventSource', lazy='selectin', cascade='all, delete-orphan', passive_deletes=True,
+    )
     
     @property
     def tags(self) -> list[str]:
-        return json.loads(self.tags_json) if self.tags_json else []
+        # Parsed once per tags_json value rather than on every access
+        cached = self.__dict__.get('_tags_cache')
+        if cached is None or cached[0] != self.tags_json:
+            cached = (self.tags_json, json.loads(self.tags_json) if self.tags_json else [])
+            self.__dict__['_tags_cache'] = cached
+        return cached[1]
     
     @tags.setter
     def tags(self, value: list[str]):
@@ -49,10 +75,69 @@ class Event(Base):
             'source': self.source,
             'image_url': self.image_url,
             'tags': self.tags,
+            'also_listed': [{'source': link.source, 'url': link.url} for link in self.source_links],
             'created_at': self.created_at.isoformat() if self.created_at else None,
         }
 
 
+class EventTag(Base):
+    """One (event, tag) pair; tags are stored lowercased by normalize_tag()."""
+    
+    __tablename__ = 'event_tags'
+    __table_args__ = (
+        Index('ix_event_tags_tag_event', 'tag', 'event_id'),
+    )
+    
+    event_id = Column(String(64), ForeignKey('events.id', ondelete='CASCADE'), primary_key=True)
+    tag = Column(String(100), primary_key=True)
+
+
+class EventSource(Base):
+    """Another source's listing of an event, merged into it at ingest (see dedup.py)."""
+    
+    __tablename__ = 'event_sources'
+    
+    event_id = Column(String(64), ForeignKey('events.id', ondelete='CASCADE'), primary_key=True)
+    url = Column(String(1000), primary_key=True)
+    source = Column(String(100), nullable=False)
+    duplicate_id = Column(String(64))  # ID the listing would have had as its own event
+    first_seen = Column(DateTime, default=datetime.utcnow)
+    last_seen = Column(DateTime, default=datetime.utcnow)
+
+
+class ArchivedEvent(Base):
+    """Past event moved out of `events` by the retention job (see retention.py)."""
+    
+    __tablename__ = 'events_archive'
+    __table_args__ = (
+        Index('ix_events_archive_source_date', 'source', 'date'),
+    )
+    
+    id = Column(String(64), primary_key=True)
+    title = Column(String(500), nullable=False)
+    description = Column(Text)
+    date = Column(DateTime, nullable=False, index=True)
+    end_date = Column(DateTime)
+    location = Column(String(500))
+    url = Column(String(1000), nullable=False)
+    source = Column(String(100), nullable=False)
+    image_url = Column(String(1000))
+    tags_json = Column(Text, default='[]')
+    content_hash = Column(String(64))
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    is_active = Column(Boolean, default=True)
+    archived_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    tags = Event.tags
+    source_links = ()  # provenance is not archived
+    
+    def to_dict(self) -> dict:
+        data = Event.to_dict(self)
+        data['archived_at'] = self.archived_at.isoformat() if self.archived_at else None
+        return data
+
+
 class Source(Base):
     """Source configuration and status tracking."""
     
@@ -66,7 +151,8 @@ class Source(Base):
     last_scrape = Column(DateTime)
     last_success = Column(DateTime)
     last_error = Column(Text)
-    event_count = Column(Integer, default=0)
+    event_source = Column(String(100))  # Event.source of the spider's items (its source_name)
+    event_count = Column(Integer, default=0)  # upcoming active events, kept by facets.py
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
@@ -83,7 +169,54 @@ class SyncLog(Base):
     events_found = Column(Integer, default=0)
     events_new = Column(Integer, default=0)
     events_updated = Column(Integer, default=0)
+    events_unchanged = Column(Integer, default=0)
+    duration_seconds = Column(Float)
     error_message = Column(Text)
+    # Crawl metrics recorded by crawler.extensions.CrawlMetrics
+    response_count = Column(Integer, default=0)
+    response_bytes = Column(Integer, default=0)
+    render_seconds = Column(Float, default=0.0)  # time spent in Playwright downloads
+    pages_unchanged = Column(Integer, default=0)  # listing pages skipped by revalidation
+    items_dropped = Column(Integer, default=0)
+    exception_count = Column(Integer, default=0)
+    stats_json = Column(Text)  # full Scrapy stats dump
+
+
+class PageCache(Base):
+    """Crawl state per page: HTTP validators, body hash and fetch times.
+    
+    Listing pages are keyed by URL, detail pages by canonical URL.
+    """
+    
+    __tablename__ = 'page_cache'
+    
+    url = Column(String(1000), primary_key=True)
+    etag = Column(String(500))
+    last_modified = Column(String(100))
+    content_hash = Column(String(64))
+    checked_at = Column(DateTime)  # last fetch, changed or not
+    parsed_at = Column(DateTime)  # last time the page was handed to the spider
+
+
+class DataGeneration(Base):
+    """Single row counting changes to the event data; see bump_generation()."""
+    
+    __tablename__ = 'data_generation'
+    
+    id = Column(Integer, primary_key=True)
+    generation = Column(Integer, nullable=False, default=0)
+    changed_at = Column(DateTime)
+
+
+class EventFacet(Base):
+    """Number of active events on `day` with a given source, tag or type; see facets.py."""
+    
+    __tablename__ = 'event_facets'
+    
+    facet = Column(String(20), primary_key=True)  # source, tag or type
+    value = Column(String(100), primary_key=True)
+    day = Column(Date, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
 
 
 class Subscriber(Base):
@@ -107,19 +240,341 @@ class Subscriber(Base):
         self.preferences_json = json.dumps(value)
 
 
-def get_engine(database_url: str = "sqlite:///data/events.db"):
-    """Create database engine."""
-    return create_engine(database_url, echo=False)
+# Applied to every new SQLite connection. The API, the bot and the scrapers
+# share one file: WAL lets readers carry on while a scrape commits, and
+# busy_timeout makes writers wait for each other instead of failing with
+# "database is locked". Override any of these under database.sqlite_pragmas
+# in config.yaml.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 10000,  # ms
+    'cache_size': -65536,  # negative = KiB, i.e. 64 MiB
+    'mmap_size': 268435456,  # 256 MiB
+    'temp_store': 'MEMORY',
+}
+
+
+def sqlite_pragmas() -> dict:
+    """SQLITE_PRAGMAS merged with the overrides from config.yaml."""
+    from config import load_config
+    
+    overrides = (load_config().get('database') or {}).get('sqlite_pragmas') or {}
+    return {**SQLITE_PRAGMAS, **overrides}
+
+
+def _set_sqlite_pragmas(pragmas: dict):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+    return on_connect
+
+
+DEFAULT_DATABASE_URL = "sqlite:///data/events.db"
+
+
+def resolve_database_url() -> str:
+    """DATABASE_URL, else database.url from config.yaml, else the local SQLite file."""
+    from config import load_config
+    
+    return (
+        os.getenv('DATABASE_URL')
+        or (load_config().get('database') or {}).get('url')
+        or DEFAULT_DATABASE_URL
+    )
+
+
+# Connection pool per process for server databases (PostgreSQL). The API,
+# the bot and each scrape size theirs through database.pool in config.yaml,
+# which reads DB_POOL_SIZE / DB_MAX_OVERFLOW from the environment.
+POOL_OPTIONS = {
+    'pool_size': 5,
+    'max_overflow': 10,
+    'pool_timeout': 30,  # s to wait for a free connection
+    'pool_recycle': 1800,  # s before a connection is replaced
+}
+
 
+def pool_options() -> dict:
+    """POOL_OPTIONS merged with database.pool from config.yaml."""
+    from config import load_config
+    
+    overrides = (load_config().get('database') or {}).get('pool') or {}
+    return {**POOL_OPTIONS, **{name: int(value) for name, value in overrides.items() if value != ''}}
+
+
+@lru_cache(maxsize=None)
+def _create_engine(database_url: str):
+    url = make_url(database_url)
+    if url.drivername == 'postgresql':
+        # requirements.txt ships psycopg2; SQLAlchemy 2.1 defaults to psycopg 3
+        url = url.set(drivername='postgresql+psycopg2')
+    if url.get_backend_name() == 'sqlite':
+        engine = create_engine(url, echo=False)
+    else:
+        engine = create_engine(url, echo=False, pool_pre_ping=True, **pool_options())
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', _set_sqlite_pragmas(sqlite_pragmas()))
+    return engine
+
+
+def get_engine(database_url: Optional[str] = None):
+    """
+    Return the process-wide engine for `database_url`.
+    
+    Engines (and their connection pools) are created once per URL and reused,
+    so call this freely. Without a URL, resolve_database_url() decides.
+    """
+    return _create_engine(database_url or resolve_database_url())
+
+
+def maintain_db(engine) -> None:
+    """
+    Refresh planner statistics and, on SQLite, merge the full-text index and
+    fold the WAL back into the file.
+
+    Meant to run periodically (after each scrape and from the scheduler).
+    A checkpoint blocked by active readers is simply retried next time.
+    """
+    from .search import optimize_search_index
+    
+    with engine.connect() as conn:
+        if engine.dialect.name == 'sqlite':
+            conn.execute(text('ANALYZE'))
+            optimize_search_index(conn)
+            conn.commit()
+            busy, wal_pages, moved = conn.execute(text('PRAGMA wal_checkpoint(TRUNCATE)')).one()
+            if busy:
+                logger.info(
+                    f"WAL checkpoint incomplete ({moved}/{wal_pages} pages), readers active"
+                )
+        else:
+            conn.execute(text('ANALYZE'))
+            conn.commit()
+
+
+@lru_cache(maxsize=None)
+def _sessionmaker_for(engine) -> sessionmaker:
+    return sessionmaker(bind=engine)
+
+
+def get_sessionmaker(database_url: Optional[str] = None) -> sessionmaker:
+    """Session factory bound to the shared engine for `database_url`."""
+    return _sessionmaker_for(get_engine(database_url))
+
+
+@lru_cache(maxsize=None)
+def get_scoped_session(database_url: Optional[str] = None) -> scoped_session:
+    """Thread-local session registry on the shared engine."""
+    return scoped_session(get_sessionmaker(database_url))
+
+
+def get_session(engine=None) -> Session:
+    """Create database session (on the shared engine unless one is given)."""
+    if engine is None:
+        engine = get_engine()
+    return _sessionmaker_for(engine)()
+
+
+@contextmanager
+def session_scope(database_url: Optional[str] = None) -> Iterator[Session]:
+    """Session that commits on success, rolls back on error and always closes."""
+    session = get_sessionmaker(database_url)()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def get_db() -> Iterator[Session]:
+    """FastAPI dependency: one session per request, closed afterwards."""
+    session = get_session()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def make_event_id(title: str, date: datetime, source: str) -> str:
+    """Stable event ID: hash of title, start date and source."""
+    unique_string = f"{title}|{date.isoformat()}|{source}"
+    return hashlib.sha256(unique_string.encode()).hexdigest()[:16]
+
+
+# Columns that make up an event's content; bookkeeping columns are left out
+FINGERPRINT_FIELDS = (
+    'title', 'description', 'date', 'end_date', 'location',
+    'url', 'source', 'image_url', 'tags_json',
+)
 
-def get_session(engine):
-    """Create database session."""
-    Session = sessionmaker(bind=engine)
-    return Session()
 
+def event_fingerprint(row: dict) -> str:
+    """SHA-256 over the content columns of an event row."""
+    values = []
+    for field in FINGERPRINT_FIELDS:
+        value = row.get(field)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        values.append('' if value is None else str(value))
+    return hashlib.sha256('\x1f'.join(values).encode()).hexdigest()
 
-def init_db(database_url: str = "sqlite:///data/events.db"):
+
+def upsert_events(session, rows: list[dict]) -> int:
+    """
+    Insert or update event rows with a batched INSERT ... ON CONFLICT DO UPDATE.
+
+    Every row must carry the same keys. `created_at` is only written on insert.
+    Backends without ON CONFLICT support fall back to session.merge().
+    The caller owns the transaction; nothing is committed here.
+    """
+    if not rows:
+        return 0
+    
+    dialect = session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        for row in rows:
+            session.merge(Event(**row))
+        return len(rows)
+    
+    columns = list(rows[0].keys())
+    stmt = insert(Event.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['id'],
+        set_={c: stmt.excluded[c] for c in columns if c not in ('id', 'created_at')},
+    )
+    # One statement, compiled once and cached, executed for all rows
+    # (executemany); embedding the rows with .values() recompiled every chunk
+    session.execute(stmt, rows)
+    return len(rows)
+
+
+def normalize_tag(tag) -> str:
+    """Lowercase, single-spaced form used in event_tags and ?tag= filters."""
+    return ' '.join(str(tag).split()).lower()[:100]
+
+
+def set_event_tags(session, tags_by_event: dict) -> None:
+    """Replace the event_tags rows of the given events. Nothing is committed."""
+    if not tags_by_event:
+        return
+    ids = list(tags_by_event)
+    for start in range(0, len(ids), 900):
+        session.execute(delete(EventTag).where(EventTag.event_id.in_(ids[start:start + 900])))
+    links = [
+        {'event_id': event_id, 'tag': tag}
+        for event_id, tags in tags_by_event.items()
+        for tag in {normalize_tag(t) for t in tags or []}
+        if tag
+    ]
+    for start in range(0, len(links), 400):
+        session.execute(insert(EventTag), links[start:start + 400])
+
+
+def filter_by_tag(query, tag: str):
+    """Restrict an Event query to events carrying `tag` (case-insensitive)."""
+    return query.join(EventTag, EventTag.event_id == Event.id).filter(EventTag.tag == normalize_tag(tag))
+
+
+def bump_generation(conn, data_changed: bool = True) -> None:
+    """
+    Record that event data changed, inside the caller's transaction.
+
+    `conn` is a Session or Connection. Readers such as the API response cache
+    compare get_generation() with what they last saw to know when to rebuild.
+    With data_changed=False (files derived from the events were rewritten,
+    e.g. the prebuilt feeds) `changed_at` keeps the time of the last change.
+    """
+    table = DataGeneration.__table__
+    values = {'changed_at': datetime.utcnow()} if data_changed else {}
+    result = conn.execute(
+        table.update().where(table.c.id == 1).values(generation=table.c.generation + 1, **values)
+    )
+    if not result.rowcount:
+        conn.execute(table.insert().values(id=1, generation=1, **values))
+
+
+def get_generation(conn) -> tuple[int, Optional[datetime]]:
+    """Current data generation and when it last changed (0, None before any change)."""
+    table = DataGeneration.__table__
+    row = conn.execute(select(table.c.generation, table.c.changed_at).where(table.c.id == 1)).first()
+    return (row.generation, row.changed_at) if row else (0, None)
+
+
+def sync_events(session, rows: list[dict]) -> dict:
+    """
+    Write only the rows whose content changed.
+
+    Each row needs a `content_hash`. Rows are compared with the stored hash:
+    unknown IDs are inserted, changed (or deactivated) ones are updated, and
+    unchanged ones are not written at all, so their `updated_at` stays put.
+    The event_tags rows of written events are rebuilt from `tags_json`.
+    Returns counts of new, updated and unchanged rows. Nothing is committed.
+    On PostgreSQL the whole batch is merged server-side instead; see
+    postgres.sync_events_copy(). Either way the facet counters are adjusted
+    for what changed (see facets.py).
+    """
+    from .facets import facet_snapshot, update_facets
+    
+    ids = [row['id'] for row in rows]
+    before = facet_snapshot(session, ids)
+    if session.get_bind().dialect.name == 'postgresql':
+        from .postgres import sync_events_copy
+        counts = sync_events_copy(session, rows)
+    else:
+        counts = _sync_events(session, rows)
+    if counts['new'] or counts['updated']:
+        update_facets(session, ids, before)
+    return counts
+
+
+def _sync_events(session, rows: list[dict]) -> dict:
+    counts = {'new': 0, 'updated': 0, 'unchanged': 0}
+    if not rows:
+        return counts
+    
+    ids = [row['id'] for row in rows]
+    existing = {}
+    for start in range(0, len(ids), 900):
+        query = session.query(Event.id, Event.content_hash, Event.is_active)
+        for event_id, content_hash, is_active in query.filter(Event.id.in_(ids[start:start + 900])):
+            existing[event_id] = (content_hash, is_active)
+    
+    changed = []
+    for row in rows:
+        stored = existing.get(row['id'])
+        if stored is None:
+            counts['new'] += 1
+        elif stored == (row['content_hash'], True):
+            counts['unchanged'] += 1
+            continue
+        else:
+            counts['updated'] += 1
+        changed.append(row)
+    
+    upsert_events(session, changed)
+    set_event_tags(session, {row['id']: json.loads(row.get('tags_json') or '[]') for row in changed})
+    if changed:
+        bump_generation(session)
+    return counts
+
+
+def init_db(database_url: Optional[str] = None):
     """Initialize database with all tables."""
+    from .migrations import upgrade
+    
     engine = get_engine(database_url)
     Base.metadata.create_all(engine)
+    upgrade(engine)
     return engine
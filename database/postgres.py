@@ -0,0 +1,116 @@
+"""Bulk ingest for PostgreSQL.
+
+sync_events() hands PostgreSQL sessions to sync_events_copy(), which replaces
+the per-row comparison and executemany upsert used on SQLite with three
+set-based statements:
+
+1. COPY the batch into a temporary events_staging table (dropped at commit).
+2. INSERT ... SELECT FROM events_staging ON CONFLICT (id) DO UPDATE, with a
+   WHERE clause so rows whose content_hash is unchanged are not rewritten.
+   RETURNING tells inserted rows from updated ones.
+3. Replace the event_tags rows of the written events, again with COPY.
+
+Only the psycopg2 (and psycopg 3) drivers are supported, since COPY goes
+through the driver connection underneath the session.
+"""
+
+import io
+import json
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+from .models import bump_generation, normalize_tag
+
+STAGING_TABLE = 'events_staging'
+
+
+def _copy_value(value) -> str:
+    """Encode one value for COPY ... FROM STDIN in text format."""
+    if value is None:
+        return r'\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, date):
+        return value.isoformat()
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def copy_rows(session, table: str, columns: list[str], rows) -> None:
+    """COPY `rows` (sequences ordered like `columns`) into `table` in the session's transaction."""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(v) for v in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+
+    driver_connection = session.connection().connection.driver_connection
+    with driver_connection.cursor() as cursor:
+        if hasattr(cursor, 'copy_expert'):  # psycopg2
+            cursor.copy_expert(sql, buffer)
+        else:  # psycopg 3
+            with cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+
+def sync_events_copy(session, rows: list[dict]) -> dict:
+    """
+    PostgreSQL version of sync_events(): COPY into staging, then one merge.
+
+    Same contract: rows need a `content_hash`, unchanged active rows are not
+    written, counts of new/updated/unchanged are returned and nothing is
+    committed.
+    """
+    counts = {'new': 0, 'updated': 0, 'unchanged': 0}
+    if not rows:
+        return counts
+
+    # ON CONFLICT cannot touch the same row twice in one statement
+    rows = list({row['id']: row for row in rows}.values())
+    columns = list(rows[0].keys())
+
+    session.execute(text(
+        f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} "
+        f"(LIKE events INCLUDING DEFAULTS) ON COMMIT DROP"
+    ))
+    session.execute(text(f"TRUNCATE {STAGING_TABLE}"))
+    copy_rows(session, STAGING_TABLE, columns, ([row[c] for c in columns] for row in rows))
+
+    column_list = ', '.join(columns)
+    updates = ', '.join(f"{c} = EXCLUDED.{c}" for c in columns if c not in ('id', 'created_at'))
+    written = session.execute(text(
+        f"INSERT INTO events ({column_list}) SELECT {column_list} FROM {STAGING_TABLE} "
+        f"ON CONFLICT (id) DO UPDATE SET {updates} "
+        f"WHERE events.content_hash IS DISTINCT FROM EXCLUDED.content_hash "
+        f"OR events.is_active IS NOT TRUE "
+        # xmax is 0 only for rows this statement inserted
+        f"RETURNING events.id, (events.xmax = 0) AS inserted"
+    )).all()
+
+    counts['new'] = sum(1 for w in written if w.inserted)
+    counts['updated'] = len(written) - counts['new']
+    counts['unchanged'] = len(rows) - len(written)
+    if not written:
+        return counts
+
+    changed = {w.id for w in written}
+    session.execute(text("DELETE FROM event_tags WHERE event_id = ANY(:ids)"), {'ids': list(changed)})
+    links = {
+        (row['id'], tag)
+        for row in rows if row['id'] in changed
+        for tag in map(normalize_tag, json.loads(row.get('tags_json') or '[]'))
+        if tag
+    }
+    if links:
+        copy_rows(session, 'event_tags', ['event_id', 'tag'], links)
+    bump_generation(session)
+    return counts
@@ -0,0 +1,97 @@
+"""Retention: move past events out of the working tables.
+
+Events dated more than `scheduler.cleanup_days` ago (config.yaml) are copied
+into events_archive and deleted from events, a batch per transaction so the
+scraper and API are never locked out for long. Their event_tags rows go with
+them, their facet counters are decremented and the full-text index is
+updated by its triggers, so listings, search and the tag index only ever
+scan recent and upcoming events. Archived events stay queryable through
+/api/archive; their event_sources provenance is dropped.
+
+Once something has been archived the freed pages are handed back to the
+filesystem: VACUUM on SQLite (followed by an FTS rebuild, since VACUUM may
+renumber rowids) and VACUUM ANALYZE on PostgreSQL.
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, literal, select, text
+
+from .facets import apply_delta, facet_snapshot
+from .models import ArchivedEvent, Event, EventSource, EventTag, PageCache, bump_generation
+from .search import rebuild_search_index
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETENTION_DAYS = 90
+ARCHIVE_BATCH_SIZE = 500
+
+_ARCHIVED_COLUMNS = [c.name for c in Event.__table__.columns]
+
+
+def _archive_batch(conn, ids: list[str], archived_at: datetime) -> None:
+    archive = ArchivedEvent.__table__
+    events = Event.__table__
+    # An event can come back after being archived (e.g. restored by hand);
+    # the newest copy wins
+    removed = facet_snapshot(conn, ids)
+    conn.execute(delete(archive).where(archive.c.id.in_(ids)))
+    conn.execute(insert(archive).from_select(
+        _ARCHIVED_COLUMNS + ['archived_at'],
+        select(*[events.c[name] for name in _ARCHIVED_COLUMNS], literal(archived_at).label('archived_at'))
+        .where(events.c.id.in_(ids)),
+    ))
+    conn.execute(delete(EventTag.__table__).where(EventTag.__table__.c.event_id.in_(ids)))
+    conn.execute(delete(EventSource.__table__).where(EventSource.__table__.c.event_id.in_(ids)))
+    conn.execute(delete(events).where(events.c.id.in_(ids)))
+    apply_delta(conn, {key: -n for key, n in removed.items()})
+    bump_generation(conn)
+
+
+def archive_past_events(engine, days: int = DEFAULT_RETENTION_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Move events dated more than `days` ago into events_archive; returns how many."""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    archived_at = datetime.utcnow()
+    events = Event.__table__
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            ids = list(conn.execute(
+                select(events.c.id).where(events.c.date < cutoff).limit(batch_size)
+            ).scalars())
+            if not ids:
+                break
+            _archive_batch(conn, ids, archived_at)
+        total += len(ids)
+        logger.info(f"Archived {total} events dated before {cutoff:%Y-%m-%d}")
+    return total
+
+
+def prune_page_cache(engine, days: int = DEFAULT_RETENTION_DAYS) -> int:
+    """Drop cached listing pages that have not been revalidated in `days`."""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    with engine.begin() as conn:
+        result = conn.execute(delete(PageCache.__table__).where(PageCache.__table__.c.checked_at < cutoff))
+    return result.rowcount or 0
+
+
+def reclaim_space(engine) -> None:
+    """Return pages freed by archiving to the filesystem."""
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        if engine.dialect.name == 'sqlite':
+            conn.execute(text('VACUUM'))
+            rebuild_search_index(conn)
+        elif engine.dialect.name == 'postgresql':
+            conn.execute(text('VACUUM ANALYZE events'))
+            conn.execute(text('VACUUM ANALYZE event_tags'))
+
+
+def run_retention(engine, days: int = DEFAULT_RETENTION_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE) -> dict:
+    """Archive old events, prune the page cache and reclaim space if anything moved."""
+    archived = archive_past_events(engine, days, batch_size)
+    pruned = prune_page_cache(engine, days)
+    if archived or pruned:
+        reclaim_space(engine)
+    logger.info(f"Retention ({days} days): {archived} events archived, {pruned} cached pages pruned")
+    return {'archived': archived, 'pages_pruned': pruned}
@@ -0,0 +1,221 @@
+"""Full-text search over event titles, descriptions and locations.
+
+SQLite uses an external-content FTS5 table, events_fts, that indexes the
+events table in place. Triggers on events keep it in step with every insert,
+update and delete, so the scrapy pipeline and save_events_to_db() need no
+extra calls. Results are ranked with bm25(), with title matches weighted
+highest.
+
+PostgreSQL uses a generated, GIN-indexed tsvector column,
+events.search_vector, ranked with ts_rank_cd() since there is no built-in
+BM25. Other databases fall back to unranked ILIKE matching.
+
+The index is created by migration 3 (see migrations.py).
+"""
+
+import html
+import re
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, bindparam, or_, text
+
+from .models import Event
+
+# bm25() column weights for title, description, location
+BM25_WEIGHTS = (10.0, 1.0, 3.0)
+SNIPPET_TOKENS = 16
+# Private-use characters that mark matches in the raw snippet; they are
+# swapped for <mark> tags after the text has been HTML-escaped
+_MARK_START = '\ue000'
+_MARK_END = '\ue001'
+
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+        title, description, location,
+        content='events', content_rowid='rowid',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_fts_ai AFTER INSERT ON events BEGIN
+        INSERT INTO events_fts(rowid, title, description, location)
+        VALUES (new.rowid, new.title, new.description, new.location);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_fts_ad AFTER DELETE ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, title, description, location)
+        VALUES ('delete', old.rowid, old.title, old.description, old.location);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_fts_au AFTER UPDATE OF title, description, location ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, title, description, location)
+        VALUES ('delete', old.rowid, old.title, old.description, old.location);
+        INSERT INTO events_fts(rowid, title, description, location)
+        VALUES (new.rowid, new.title, new.description, new.location);
+    END
+    """,
+]
+
+_POSTGRES_DDL = [
+    """
+    ALTER TABLE events ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(location, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_events_search_vector ON events USING GIN (search_vector)",
+]
+
+
+def create_search_index(conn) -> None:
+    """Create the full-text index for the connection's dialect and fill it."""
+    dialect = conn.dialect.name
+    if dialect == 'sqlite':
+        for ddl in _SQLITE_DDL:
+            conn.execute(text(ddl))
+        rebuild_search_index(conn)
+    elif dialect == 'postgresql':
+        for ddl in _POSTGRES_DDL:
+            conn.execute(text(ddl))
+
+
+def rebuild_search_index(conn) -> None:
+    """Re-read every event into events_fts (SQLite only).
+
+    Needed after VACUUM, which may renumber the rowids the index points at.
+    """
+    if conn.dialect.name == 'sqlite':
+        conn.execute(text("INSERT INTO events_fts(events_fts) VALUES ('rebuild')"))
+
+
+def optimize_search_index(conn) -> None:
+    """Merge FTS5 index segments (SQLite only); cheap to run periodically."""
+    if conn.dialect.name == 'sqlite':
+        conn.execute(text("INSERT INTO events_fts(events_fts) VALUES ('optimize')"))
+
+
+def fts_query(q: str) -> Optional[str]:
+    """Turn free text into a safe FTS5 query: every word must match, the last as a prefix."""
+    words = re.findall(r'\w+', q or '')
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def highlight(snippet: Optional[str]) -> str:
+    """HTML-escape a raw snippet, then turn its match sentinels into <mark> tags."""
+    escaped = html.escape(snippet or '')
+    return escaped.replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+
+
+def full_text_search(
+    session,
+    q: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> tuple[int, list[dict]]:
+    """
+    Rank active events matching `q` within [start, end].
+
+    Returns the total number of matches and one page of results, each a dict
+    with the Event, its rank (higher is better) and an HTML-escaped snippet
+    in which the matched words are wrapped in <mark>. Event text comes from
+    third-party pages, so nothing in it is passed through as markup.
+    """
+    dialect = session.get_bind().dialect.name
+    params = {'limit': limit, 'offset': offset, 'mark_start': _MARK_START, 'mark_end': _MARK_END}
+    filters = ['e.is_active = :active']
+    params['active'] = True
+    if start is not None:
+        filters.append('e.date >= :start')
+        params['start'] = start
+    if end is not None:
+        filters.append('e.date <= :end')
+        params['end'] = end
+    where = ' AND '.join(filters)
+
+    if dialect == 'sqlite':
+        match = fts_query(q)
+        if match is None:
+            return 0, []
+        params['q'] = match
+        # CROSS JOIN keeps SQLite from driving the join from the date index and
+        # re-running the MATCH once per event
+        base = f"FROM events_fts CROSS JOIN events e ON e.rowid = events_fts.rowid WHERE events_fts MATCH :q AND {where}"
+        weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+        page_sql = (
+            f"SELECT e.id, -bm25(events_fts, {weights}) AS rank, "
+            f"snippet(events_fts, -1, :mark_start, :mark_end, '…', {SNIPPET_TOKENS}) AS snippet "
+            f"{base} ORDER BY bm25(events_fts, {weights}), e.date LIMIT :limit OFFSET :offset"
+        )
+    elif dialect == 'postgresql':
+        if not (q or '').strip():
+            return 0, []
+        params['q'] = q
+        params['headline_options'] = (
+            f'StartSel="{_MARK_START}", StopSel="{_MARK_END}", '
+            f'MaxWords={SNIPPET_TOKENS * 2}, MinWords={SNIPPET_TOKENS // 2}'
+        )
+        base = f"FROM events e, websearch_to_tsquery('english', :q) query WHERE e.search_vector @@ query AND {where}"
+        page_sql = (
+            "SELECT e.id, ts_rank_cd(e.search_vector, query) AS rank, "
+            "ts_headline('english', concat_ws(' — ', e.title, e.description, e.location), query, "
+            ":headline_options) AS snippet "
+            f"{base} ORDER BY rank DESC, e.date LIMIT :limit OFFSET :offset"
+        )
+    else:
+        return _like_search(session, q, start, end, limit, offset)
+
+    dates = [bindparam(name, type_=DateTime) for name in ('start', 'end') if name in params]
+    total = session.execute(text(f"SELECT count(*) {base}").bindparams(*dates), params).scalar()
+    hits = session.execute(text(page_sql).bindparams(*dates), params).all()
+    if not hits:
+        return total, []
+
+    events = {e.id: e for e in session.query(Event).filter(Event.id.in_([h.id for h in hits]))}
+    return total, [
+        {'event': events[h.id], 'rank': float(h.rank), 'snippet': highlight(h.snippet)}
+        for h in hits
+        if h.id in events
+    ]
+
+
+def _like_search(session, q, start, end, limit, offset) -> tuple[int, list[dict]]:
+    """
+    full_text_search() on databases without a full-text index: every word
+    must appear in the title, description or location, soonest events first.
+    """
+    words = re.findall(r'\w+', q or '')
+    if not words:
+        return 0, []
+    query = session.query(Event).filter(Event.is_active == True)
+    if start is not None:
+        query = query.filter(Event.date >= start)
+    if end is not None:
+        query = query.filter(Event.date <= end)
+    for word in words:
+        pattern = f'%{word}%'
+        query = query.filter(or_(
+            Event.title.ilike(pattern), Event.description.ilike(pattern), Event.location.ilike(pattern),
+        ))
+
+    total = query.count()
+    events = query.order_by(Event.date, Event.id).offset(offset).limit(limit).all()
+    matches = re.compile('|'.join(re.escape(w) for w in words), re.IGNORECASE)
+    results = []
+    for event in events:
+        body = ' — '.join(t for t in (event.title, event.description, event.location) if t)
+        body = ' '.join(body.split()[:SNIPPET_TOKENS * 2])
+        snippet = matches.sub(lambda m: f'{_MARK_START}{m.group(0)}{_MARK_END}', body)
+        results.append({'event': event, 'rank': 0.0, 'snippet': highlight(snippet)})
+    return total, results
@@ -0,0 +1,283 @@
+"""RSS and Atom feeds of upcoming events.
+
+Scrape and search runs call write_feeds() when they finish. It renders a
+global feed, one per source and one per tag, each in RSS and Atom, into
+FEED_DIR together with a manifest.json. /rss.xml and /atom.xml serve those
+files as they are (see prebuilt_feed()) and only render live with
+render_feed() for other parameter combinations, or when the prebuilt feeds
+are missing or older than MAX_AGE.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Optional
+
+import pytz
+from feedgen.feed import FeedGenerator
+
+from database import Event, EventTag, bump_generation, filter_by_tag, get_generation, normalize_tag, session_scope
+
+logger = logging.getLogger(__name__)
+
+FEED_DIR = os.getenv("FEED_DIR", os.path.join("data", "feeds"))
+FEED_DAYS = 30
+MAX_ITEMS = 100
+MAX_AGE = timedelta(hours=24)
+REBUILD_AFTER = timedelta(hours=1)
+MEDIA_TYPES = {
+    "rss": "application/rss+xml",
+    "atom": "application/atom+xml",
+}
+
+
+def slugify(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "_"
+
+
+def unique_slugs(names) -> dict:
+    """
+    File slug of each name. Names that slugify alike ("C++ Meetup" and
+    "C Meetup") get a short hash of the name appended, so that no two share
+    a feed file, whatever order they come in.
+    """
+    by_slug = {}
+    for name in names:
+        by_slug.setdefault(slugify(name), []).append(name)
+    slugs = {}
+    for slug, group in by_slug.items():
+        for name in group:
+            if len(group) > 1:
+                slugs[name] = f"{slug}-{hashlib.sha1(name.encode()).hexdigest()[:8]}"
+            else:
+                slugs[name] = slug
+    return slugs
+
+
+def feed_events(session, source=None, tag=None, days=FEED_DAYS, exact_source=False) -> list:
+    # Relax start date filters to include today's events that might appear "past" in UTC vs Local
+    start_date = datetime.utcnow() - timedelta(hours=24)
+    end_date = datetime.utcnow() + timedelta(days=days)
+
+    query = session.query(Event).filter(
+        Event.is_active == True,
+        Event.date >= start_date,
+        Event.date <= end_date
+    )
+
+    if source and exact_source:
+        query = query.filter(Event.source == source)
+    elif source:
+        query = query.filter(Event.source.ilike(f"%{source}%"))
+    if tag:
+        query = filter_by_tag(query, tag)
+
+    return query.order_by(Event.date).limit(MAX_ITEMS).all()
+
+
+def build_feed(events: list, updated: Optional[datetime]) -> FeedGenerator:
+    """
+    Feed of `events`. `updated` (the last data change) is used for
+    lastBuildDate so that unchanged data renders to the same bytes.
+    """
+    fg = FeedGenerator()
+    fg.id("http://localhost:8000")
+    fg.title("Boston Events Aggregator")
+    fg.link(href="http://localhost:8000", rel="alternate")
+    fg.description("Tech, startup, and networking events in Boston/MA")
+    fg.language("en")
+
+    # Ensure lastBuildDate is timezone aware
+    fg.lastBuildDate((updated or datetime.utcnow()).replace(tzinfo=pytz.UTC))
+
+    for event in events:
+        fe = fg.add_entry()
+        fe.id(event.id)
+        fe.title(event.title)
+        fe.link(href=event.url)
+        fe.description(event.description or "")
+
+        # Ensure published date is timezone aware
+        evt_date = event.date
+        if not evt_date.tzinfo:
+            evt_date = evt_date.replace(tzinfo=pytz.UTC)
+
+        fe.published(evt_date)
+        fe.updated((event.updated_at or event.date).replace(tzinfo=pytz.UTC))
+
+        content = ""
+        if event.location:
+            content += f"📍 {event.location}<br/>"
+        if event.source:
+            content += f"🏷️ {event.source}<br/>"
+        if event.date:
+            content += f"📅 {event.date.strftime('%Y-%m-%d %H:%M')}<br/><br/>"
+        content += event.description or ""
+
+        fe.content(content, type="html")
+
+    return fg
+
+
+def serialize(fg: FeedGenerator, fmt: str) -> bytes:
+    return fg.atom_str(pretty=True) if fmt == "atom" else fg.rss_str(pretty=True)
+
+
+def render_feed(session, source=None, tag=None, days=FEED_DAYS, fmt="rss") -> bytes:
+    """Render a feed from the database, for any parameters."""
+    _, changed_at = get_generation(session)
+    return serialize(build_feed(feed_events(session, source, tag, days), changed_at), fmt)
+
+
+def _feed_path(directory: str, fmt: str, kind: str, slug: str) -> str:
+    return os.path.join(directory, fmt, kind, f"{slug}.xml")
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _write_if_changed(path: str, data: bytes) -> bool:
+    """Write `data` to `path` unless it holds those bytes already; returns whether it wrote."""
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    _write_atomic(path, data)
+    return True
+
+
+def _read_manifest(directory: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        manifest["generated_at"] = datetime.fromisoformat(manifest["generated_at"])
+        return manifest
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def write_feeds(directory: str = FEED_DIR) -> int:
+    """
+    Prebuild the global, per-source and per-tag feeds; returns how many files
+    changed. Nothing is rebuilt while the data generation is the one the
+    feeds were built from, unless they are older than REBUILD_AFTER (events
+    move in and out of the FEED_DAYS window). Files whose bytes are unchanged
+    are not rewritten, and cached responses are only invalidated when a file
+    was written or removed.
+    """
+    previous = _read_manifest(directory)
+    with session_scope() as session:
+        generation, changed_at = get_generation(session)
+    if (
+        previous is not None
+        and previous.get("generation") == generation
+        and datetime.utcnow() - previous["generated_at"] < REBUILD_AFTER
+    ):
+        logger.info("Feeds are up to date")
+        return 0
+
+    written = set()
+    changed = 0
+    manifest = {"sources": {}, "tags": {}}
+
+    with session_scope() as session:
+        start_date = datetime.utcnow() - timedelta(hours=24)
+        end_date = datetime.utcnow() + timedelta(days=FEED_DAYS)
+        upcoming = (Event.is_active == True, Event.date >= start_date, Event.date <= end_date)
+        sources = [s for (s,) in session.query(Event.source).filter(*upcoming).distinct()]
+        tags = [
+            t for (t,) in session.query(EventTag.tag)
+            .join(Event, Event.id == EventTag.event_id).filter(*upcoming).distinct()
+        ]
+
+        feeds = [("all", "all", {})]
+        for source, slug in unique_slugs(sources).items():
+            manifest["sources"][slug] = source
+            feeds.append(("source", slug, {"source": source, "exact_source": True}))
+        for tag, slug in unique_slugs(tags).items():
+            manifest["tags"][slug] = tag
+            feeds.append(("tag", slug, {"tag": tag}))
+
+        for kind, slug, filters in feeds:
+            fg = build_feed(feed_events(session, **filters), changed_at)
+            for fmt in MEDIA_TYPES:
+                path = _feed_path(directory, fmt, kind, slug)
+                changed += _write_if_changed(path, serialize(fg, fmt))
+                written.add(os.path.abspath(path))
+
+    # Feeds of sources and tags that have no upcoming events any more
+    for fmt in MEDIA_TYPES:
+        for root, _, files in os.walk(os.path.join(directory, fmt)):
+            for name in files:
+                path = os.path.abspath(os.path.join(root, name))
+                if path not in written:
+                    os.remove(path)
+                    changed += 1
+
+    if changed:
+        # Cached responses were built from the previous files; the events
+        # themselves did not change, so changed_at (lastBuildDate) stays put
+        with session_scope() as session:
+            bump_generation(session, data_changed=False)
+            # Unless events changed meanwhile, the files match the new generation
+            if get_generation(session)[0] == generation + 1:
+                generation += 1
+
+    manifest["generation"] = generation
+    manifest["generated_at"] = datetime.utcnow().isoformat()
+    _write_atomic(os.path.join(directory, "manifest.json"), json.dumps(manifest, indent=2).encode())
+
+    logger.info(f"Wrote {changed} of {len(written)} feeds to {directory}")
+    return changed
+
+
+def prebuilt_feed(source=None, tag=None, fmt="rss", directory: str = FEED_DIR) -> Optional[bytes]:
+    """
+    Bytes of the prebuilt feed matching these filters, or None when there is
+    none (combined filters, an unknown tag) or the feeds are out of date.
+    """
+    manifest = _read_manifest(directory)
+    if manifest is None or datetime.utcnow() - manifest["generated_at"] > MAX_AGE:
+        return None
+
+    if source and tag:
+        return None
+    if source:
+        # ?source= matches as a substring, which must pick out a single source
+        matches = [slug for slug, name in manifest["sources"].items() if source.lower() in name.lower()]
+        if len(matches) != 1:
+            return None
+        path = _feed_path(directory, fmt, "source", matches[0])
+    elif tag:
+        tag = normalize_tag(tag)
+        slug = next((slug for slug, name in manifest["tags"].items() if name == tag), None)
+        if slug is None:
+            return None
+        path = _feed_path(directory, fmt, "tag", slug)
+    else:
+        path = _feed_path(directory, fmt, "all", "all")
+
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def load_feed(session, source=None, tag=None, days=FEED_DAYS, fmt="rss") -> bytes:
+    """The prebuilt feed when there is one for these parameters, else a live render."""
+    if days == FEED_DAYS:
+        body = prebuilt_feed(source, tag, fmt)
+        if body is not None:
+            return body
+    return render_feed(session, source, tag, days, fmt)
@@ -2,39 +2,25 @@
 import os
 import sys
 from datetime import datetime, timezone
-from sqlalchemy.sql import func
-from jinja2 import Environment, FileSystemLoader
-from database.models import Event, get_engine, get_session
+from api.fragments import page_events, render_page
+from database.facets import get_facets
+from database.models import get_session
 
 def generate_static_html():
-    engine = get_engine()
-    session = get_session(engine)
+    session = get_session()
     
-    # Get all active future events
+    # Get all active events from the start of today, like the live page
     now = datetime.now(timezone.utc).replace(tzinfo=None) # naive DB match
-    events = session.query(Event).filter(
-        Event.is_active == True,
-        Event.date >= now
-    ).order_by(Event.date).all()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    events = page_events(session, today, limit=None)
     
     # Get source stats
-    source_counts = session.query(
-        Event.source, func.count(Event.source)
-    ).filter(
-        Event.is_active == True,
-        Event.date >= now
-    ).group_by(Event.source).all()
+    counts = get_facets(session, today.date())
     
     session.close()
     
     # Render Layout
-    env = Environment(loader=FileSystemLoader("templates"))
-    template = env.get_template("index.html")
-    
-    output_html = template.render(
-        events=events,
-        sources=source_counts
-    )
+    output_html = render_page(events, list(counts["sources"].items()), counts["total"])
     
     # Ensure public dir exists
     if not os.path.exists("public"):
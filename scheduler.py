@@ -56,6 +56,42 @@ def run_digest_job():
     except Exception as e:
         logger.error(f"Digest job failed: {e}")
 
+def run_maintenance_job():
+    """Refreshes planner statistics and checkpoints the SQLite WAL."""
+    logger.info("Starting database maintenance...")
+    try:
+        from database import get_engine, maintain_db
+        maintain_db(get_engine())
+        logger.info("Database maintenance finished.")
+    except Exception as e:
+        logger.error(f"Database maintenance failed: {e}")
+
+def run_retention_job():
+    """Archives events older than scheduler.cleanup_days and reclaims space."""
+    logger.info("Starting retention job...")
+    try:
+        from config import load_config
+        from database import get_engine
+        from database.retention import DEFAULT_RETENTION_DAYS, run_retention
+        days = load_config().get('scheduler', {}).get('cleanup_days', DEFAULT_RETENTION_DAYS)
+        result = run_retention(get_engine(), days=int(days))
+        logger.info(f"Retention job finished: {result['archived']} events archived.")
+    except Exception as e:
+        logger.error(f"Retention job failed: {e}")
+
+def run_facets_job():
+    """Rebuilds the facet counters from the events table to repair any drift."""
+    logger.info("Recomputing facet counts...")
+    try:
+        from database import bump_generation, get_engine
+        from database.facets import recompute_facets
+        with get_engine().begin() as conn:
+            counters = recompute_facets(conn)
+            bump_generation(conn)
+        logger.info(f"Facet counts recomputed: {counters} counters.")
+    except Exception as e:
+        logger.error(f"Facet recompute failed: {e}")
+
 def start_scheduler():
     logger.info("Scheduler started.")
     
@@ -69,6 +105,15 @@ def start_scheduler():
     # Schedule Digest (9 PM)
     schedule.every().day.at("21:00").do(run_digest_job)
     
+    # Keep the WAL short and the query planner's statistics fresh
+    schedule.every(6).hours.do(run_maintenance_job)
+    
+    # Archive old events overnight, when nothing else is writing
+    schedule.every().day.at("03:00").do(run_retention_job)
+    
+    # Repair any drift in the incrementally maintained facet counts
+    schedule.every(6).hours.do(run_facets_job)
+    
     # Run scrape and search immediately on startup to populate DB
     run_scrape_job()
     run_search_job()
@@ -2,7 +2,8 @@ import logging
 import subprocess
 import sys
 import os
-import re
+import json
+from datetime import datetime
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -14,6 +15,132 @@ SPIDERS = [
     'lab_central', 'venture_lane'
 ]
 
+# "process" schedules every spider on one CrawlerProcess with a shared browser;
+# "subprocess" runs `scrapy crawl` once per spider, one after another.
+SCRAPE_MODE = os.getenv("SCRAPE_MODE", "process")
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "4"))
+
+
+def run_spiders_subprocess(spiders, stats):
+    """Run each spider in its own `scrapy crawl` subprocess, sequentially."""
+    for spider in spiders:
+        logger.info(f"🕸️ Starting spider: {spider}")
+        try:
+            # Scrapy's log goes straight to our stderr; results are read back
+            # from sync_logs afterwards
+            result = subprocess.run(
+                [sys.executable, "-m", "scrapy", "crawl", spider],
+                cwd=os.getcwd(),
+            )
+            if result.returncode != 0:
+                logger.error(f"❌ Spider {spider} failed with code {result.returncode}")
+                stats["failed"].append((spider, f"scrapy crawl exited with code {result.returncode}"))
+        except Exception as e:
+            logger.error(f"Failed to run spider {spider}: {e}")
+            stats["failed"].append((spider, str(e)))
+
+
+def run_spiders_in_process(spiders, stats, concurrency=SCRAPE_CONCURRENCY):
+    """
+    Run all spiders on a single CrawlerProcess/reactor.
+
+    At most `concurrency` spiders crawl at the same time, and they all share one
+    Playwright browser.
+    """
+    from scrapy import signals
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+    from twisted.internet import defer
+
+    settings = get_project_settings()
+    settings.set("PLAYWRIGHT_BROWSER_PROVIDER", "crawler.browser.SharedBrowserProvider")
+    process = CrawlerProcess(settings, install_root_handler=False)
+    semaphore = defer.DeferredSemaphore(max(1, concurrency))
+
+    def track(spider, crawler):
+        def spider_opened(spider):
+            logger.info(f"🕸️ Starting spider: {spider.name}")
+
+        def spider_closed(spider, reason):
+            logger.info(f"Spider {spider.name} closed ({reason})")
+
+        def crawl_failed(failure):
+            logger.error(f"❌ Spider {spider} failed: {failure.getErrorMessage()}")
+            stats["failed"].append((spider, failure.getErrorMessage()))
+
+        crawler.signals.connect(spider_opened, signal=signals.spider_opened, weak=False)
+        crawler.signals.connect(spider_closed, signal=signals.spider_closed, weak=False)
+        return crawl_failed
+
+    for spider in spiders:
+        try:
+            crawler = process.create_crawler(spider)
+        except Exception as e:
+            logger.error(f"Failed to run spider {spider}: {e}")
+            stats["failed"].append((spider, str(e)))
+            continue
+        crawl_failed = track(spider, crawler)
+        semaphore.run(process.crawl, crawler).addErrback(crawl_failed)
+
+    process.start()
+
+
+def collect_results(spiders, stats, since):
+    """
+    File each spider's outcome from the sync_logs rows written by CrawlMetrics.
+
+    Only rows that started at or after `since` count. A spider that already
+    failed to start, or that left no row, is reported as failed.
+    """
+    from database import SyncLog, get_session
+
+    already_failed = {name for name, _ in stats["failed"]}
+    session = get_session()
+    try:
+        logs = (
+            session.query(SyncLog)
+            .filter(SyncLog.source.in_(spiders), SyncLog.started_at >= since)
+            .order_by(SyncLog.started_at)
+            .all()
+        )
+    finally:
+        session.close()
+    latest = {log.source: log for log in logs}
+
+    for spider in spiders:
+        log = latest.get(spider)
+        if log is None:
+            if spider not in already_failed:
+                stats["failed"].append((spider, "No crawl was recorded"))
+            continue
+        if log.status == "error":
+            if spider not in already_failed:
+                stats["failed"].append((spider, log.error_message or "Unknown error"))
+            continue
+        if log.status == "partial":
+            logger.warning(f"⚠️ Spider {spider} finished with errors: {log.error_message}")
+        logger.info(
+            f"📈 {spider}: {log.response_count} responses, {log.response_bytes / 1024:.0f} KiB, "
+            f"{log.render_seconds:.1f}s rendering, {log.items_dropped} dropped, "
+            f"{log.exception_count} exceptions in {log.duration_seconds:.1f}s"
+        )
+        record_spider_result(stats, spider, log.events_found, log.pages_unchanged > 0)
+
+
+def record_spider_result(stats, spider, count, unchanged=False):
+    """File a finished spider under success/unchanged/empty and add to the total."""
+    logger.info(f"✅ Spider {spider} finished. Items: {count}")
+    stats["total_new"] += count
+    
+    if count > 0:
+        stats["success"].append((spider, count))
+    elif unchanged:
+        # Listing page identical to the last crawl, so nothing was parsed
+        stats["unchanged"].append(spider)
+    else:
+        stats["empty"].append(spider)
+
+
 def main():
     logger.info("Starting Scrapy Crawl Cycle...")
     
@@ -21,52 +148,35 @@ def main():
     from database import init_db
     init_db()
 
+    started_at = datetime.utcnow()
     stats = {
         "success": [],
+        "unchanged": [],
         "empty": [],
         "failed": [],
         "total_new": 0
     }
 
-    # regex to extract item count from scrapy log
-    # Log line example: 'item_scraped_count': 20,
-    item_count_pattern = re.compile(r"'item_scraped_count': (\d+)")
+    if SCRAPE_MODE == "subprocess":
+        run_spiders_subprocess(SPIDERS, stats)
+    else:
+        logger.info(f"Running {len(SPIDERS)} spiders in one process ({SCRAPE_CONCURRENCY} at a time)")
+        run_spiders_in_process(SPIDERS, stats)
 
-    for spider in SPIDERS:
-        logger.info(f"🕸️ Starting spider: {spider}")
-        try:
-            result = subprocess.run(
-                [sys.executable, "-m", "scrapy", "crawl", spider],
-                cwd=os.getcwd(),
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='replace'
-            )
-            
-            if result.returncode == 0:
-                # Parse item count from logs (stderr)
-                match = item_count_pattern.search(result.stderr)
-                count = int(match.group(1)) if match else 0
-                
-                logger.info(f"✅ Spider {spider} finished. Items: {count}")
-                stats["total_new"] += count
-                
-                if count > 0:
-                    stats["success"].append((spider, count))
-                else:
-                    stats["empty"].append(spider)
-            else:
-                logger.error(f"❌ Spider {spider} failed with code {result.returncode}")
-                # Try to capture last few lines of error
-                error_snippet = "\n".join(result.stderr.splitlines()[-3:])
-                stats["failed"].append((spider, error_snippet))
+    logger.info("All spiders completed.")
+    collect_results(SPIDERS, stats, started_at)
 
-        except Exception as e:
-            logger.error(f"Failed to run spider {spider}: {e}")
-            stats["failed"].append((spider, str(e)))
+    try:
+        from feeds import write_feeds
+        write_feeds()
+    except Exception as e:
+        logger.error(f"Writing feeds failed: {e}")
 
-    logger.info("All spiders completed.")
+    try:
+        from database import get_engine, maintain_db
+        maintain_db(get_engine())
+    except Exception as e:
+        logger.error(f"Database maintenance failed: {e}")
 
     # Notify Telegram
     try:
@@ -88,6 +198,12 @@ def main():
                     message += f"• {name.replace('_', ' ').title()}: {count}\n"
                 message += "\n"
                 
+            if stats["unchanged"]:
+                message += "♻️ *Unchanged Since Last Scrape:*\n"
+                for name in stats["unchanged"]:
+                    message += f"• {name.replace('_', ' ').title()}\n"
+                message += "\n"
+                
             if stats["empty"]:
                 message += "⚠️ *No Events Found (Check if Site Changed):*\n"
                 for name in stats["empty"]:
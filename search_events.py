@@ -4,7 +4,7 @@ import time
 import json
 import logging
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from tavily import TavilyClient
 import google.generativeai as genai
 from groq import Groq
@@ -12,7 +12,10 @@ import httpx
 
 from cerebras.cloud.sdk import Cerebras
 from dotenv import load_dotenv
-from database.models import Event, get_engine, get_session
+from database.dedup import find_duplicates, merge_duplicates
+from database.models import Event, event_fingerprint, get_session, make_event_id, sync_events
+from feeds import write_feeds
+from tagging_utils import suggest_tags
 
 # Load env vars
 load_dotenv()
@@ -262,55 +265,106 @@ def extract_events_with_cerebras(search_results: List[Dict[str, Any]]) -> List[D
 
     return events
 
+SEARCH_SOURCE = "Tavily Search"
+
+
+def parse_event_date(date_str: Optional[str]) -> Optional[datetime]:
+    if not date_str:
+        return None
+    try:
+        return datetime.fromisoformat(date_str)
+    except ValueError:
+        try:
+            return datetime.strptime(date_str[:10], "%Y-%m-%d")
+        except ValueError:
+            return None
+
+
+def search_event_row(evt_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Map an extracted search result to an `events` row (date may be None)."""
+    event_date = parse_event_date(evt_data.get('date'))
+    return {
+        'id': make_event_id(evt_data.get('title'), event_date, SEARCH_SOURCE) if event_date else None,
+        'title': evt_data.get('title'),
+        'description': evt_data.get('description'),
+        'date': event_date,
+        'location': evt_data.get('location'),
+        'url': evt_data.get('url'),
+        'source': SEARCH_SOURCE,
+    }
+
+
+def drop_known_candidates(candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Remove candidates that are already stored, by URL or as a near-duplicate
+    of another source's event, so they are not verified (and paid for) again.
+    """
+    rows = [search_event_row(c) for c in candidates]
+    session = get_session()
+    try:
+        urls = [r['url'] for r in rows if r['url']]
+        known = {url for (url,) in session.query(Event.url).filter(Event.url.in_(urls))}
+        duplicates = find_duplicates(session, [r for r in rows if r['id']])
+    except Exception as e:
+        logger.error(f"Duplicate check failed, verifying all candidates: {e}")
+        return candidates
+    finally:
+        session.close()
+    return [
+        c for c, r in zip(candidates, rows)
+        if r['url'] not in known and r['id'] not in duplicates
+    ]
+
+
 def save_events_to_db(events: List[Dict[str, Any]]):
     """
     Save extracted events to the database, avoiding duplicates.
+
+    Events whose URL or ID is already stored are skipped. Near-duplicates of
+    other sources' events are merged into them (see database/dedup.py).
     """
-    engine = get_engine()
-    session = get_session(engine)
+    session = get_session()
     
-    count = 0
+    rows = {}
     for evt_data in events:
-        try:
-            if not evt_data.get('url'): continue
-            
-            existing = session.query(Event).filter(Event.url == evt_data['url']).first()
-            if existing:
-                continue
-            
-            # Parse date
-            date_str = evt_data.get('date')
-            event_date = None
-            if date_str:
-                try:
-                    event_date = datetime.fromisoformat(date_str)
-                except ValueError:
-                    try:
-                        event_date = datetime.strptime(date_str[:10], "%Y-%m-%d")
-                    except:
-                        pass
-            
-            if not event_date:
-                 # Default to next week if unknown, or skip? better to have approximate date than none
-                 event_date = datetime.now() + timedelta(days=7)
-            
-            new_event = Event(
-                id=os.urandom(8).hex(),
-                title=evt_data.get('title'),
-                description=evt_data.get('description'),
-                date=event_date,
-                location=evt_data.get('location'),
-                url=evt_data.get('url'),
-                source="Tavily Search",
-                image_url=None,
-                created_at=datetime.now(timezone.utc)
-            )
-            session.add(new_event)
-            count += 1
-        except Exception as e:
-            logger.error(f"Error saving event {evt_data.get('title')}: {e}")
+        if not evt_data.get('url'): continue
+        row = search_event_row(evt_data)
+        if not row['date']:
+            # Better to have an approximate date than none
+            row['date'] = datetime.now() + timedelta(days=7)
+            row['id'] = make_event_id(row['title'], row['date'], SEARCH_SOURCE)
+        rows.setdefault(row['id'], row)
     
     try:
+        rows = list(rows.values())
+        urls = [r['url'] for r in rows]
+        known_urls = {url for (url,) in session.query(Event.url).filter(Event.url.in_(urls))}
+        known_ids = {i for (i,) in session.query(Event.id).filter(Event.id.in_([r['id'] for r in rows]))}
+        rows = [r for r in rows if r['url'] not in known_urls and r['id'] not in known_ids]
+        rows = merge_duplicates(session, rows)
+    except Exception as e:
+        logger.error(f"Duplicate check failed: {e}")
+        session.rollback()
+        session.close()
+        return
+    
+    now = datetime.utcnow()
+    for row in rows:
+        tags = suggest_tags(row['title'], row['description'])
+        row.update(
+            end_date=None,
+            image_url=None,
+            tags_json=json.dumps(tags),
+            is_active=True,
+            created_at=now,
+            updated_at=now,
+        )
+        row['content_hash'] = event_fingerprint(row)
+    
+    try:
+        # Same write path as the crawler: tags, facet counts and the data
+        # generation are all kept in step
+        count = sync_events(session, rows)['new']
         session.commit()
         logger.info(f"Saved {count} new events from search.")
     except Exception as e:
@@ -409,6 +463,8 @@ def run_daily_search():
             time.sleep(2)
             candidates = extract_events_with_cerebras(results)
             logger.info(f"   --> Stage 1: {len(candidates)} candidates.")
+            candidates = drop_known_candidates(candidates)
+            logger.info(f"   --> {len(candidates)} not yet known, verifying.")
             
             # Stage 2: Deep Verification
             for cand in candidates:
@@ -437,6 +493,11 @@ def run_daily_search():
         save_events_to_db(list(unique_events.values()))
     else:
         logger.info("No events found after verification.")
+    
+    try:
+        write_feeds()
+    except Exception as e:
+        logger.error(f"Writing feeds failed: {e}")
         
     logger.info("Daily Search Job Completed.")
 
@@ -8,7 +8,7 @@ import requests
 from dotenv import load_dotenv
 from cerebras.cloud.sdk import Cerebras
 from groq import Groq
-from database.models import get_engine, get_session, Event
+from database.models import get_session, Event
 
 # Ensure we can import from parent directory
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -169,8 +169,7 @@ def curate_events_with_cerebras(events):
 
 
 def generate_digest():
-    engine = get_engine()
-    session = get_session(engine)
+    session = get_session()
     
     try:
         # Fetch upcoming events
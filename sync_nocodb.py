@@ -3,7 +3,7 @@ import requests
 import logging
 import json
 from dotenv import load_dotenv
-from database.models import get_session, get_engine, Event
+from database.models import get_session, Event
 from tagging_utils import generate_tags
 
 # Setup logging
@@ -24,8 +24,7 @@ def sync_events_to_nocodb():
         logger.error("❌ NocoDB credentials missing in .env")
         return
 
-    engine = get_engine()
-    session = get_session(engine)
+    session = get_session()
     events = session.query(Event).all()
     session.close()
 
@@ -15,19 +15,27 @@ TAG_RULES = {
     "VC": ["venture capital", "angel", "investor", "fundraising"]
 }
 
-def generate_tags(title: str, description: str = "") -> str:
+def suggest_tags(title: str, description: str = "") -> list[str]:
     """
     Analyzes title and description to generate a list of tags.
-    Returns a JSON string of tags.
+    Tags come back in TAG_RULES order, so the same text always gives the same list.
     """
-    text = (title + " " + (description or "")).lower()
-    tags = set()
+    text = ((title or "") + " " + (description or "")).lower()
+    tags = []
     
     for category, keywords in TAG_RULES.items():
         for keyword in keywords:
             # Simple check for now. Can be improved with regex \bword\b
             if keyword in text:
-                tags.add(category)
+                tags.append(category)
                 break
     
-    return json.dumps(list(tags))
+    return tags
+
+
+def generate_tags(title: str, description: str = "") -> str:
+    """
+    Analyzes title and description to generate a list of tags.
+    Returns a JSON string of tags.
+    """
+    return json.dumps(suggest_tags(title, description))
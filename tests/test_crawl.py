@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+
+from scrapy.crawler import CrawlerProcess
+from scrapy.utils.project import get_project_settings
+
+from crawler.spiders.venture_lane import VentureLaneSpider
+from database import Event, Source
+
+LISTING = """
+<html><body>
+{events}
+</body></html>
+"""
+EVENT = """
+<article class="tribe-events-calendar-month__calendar-event">
+  <a class="tribe-events-calendar-month__calendar-event-title-link" href="https://theventurelane.com/e/{n}">Pitch Night {n}</a>
+  <div class="tribe-events-calendar-month__calendar-event-tooltip-datetime"><time datetime="{date}"></time></div>
+</article>
+"""
+
+
+def test_crawl_sets_source_event_count(database_url, session, tmp_path, monkeypatch):
+    monkeypatch.setenv("SCRAPY_SETTINGS_MODULE", "crawler.settings")
+    monkeypatch.chdir(tmp_path)  # the spider dumps its listing HTML to the working directory
+    day = datetime.utcnow() + timedelta(days=3)
+    page = tmp_path / "events.html"
+    page.write_text(LISTING.format(events="".join(
+        EVENT.format(n=n, date=(day + timedelta(days=n)).strftime("%Y-%m-%d")) for n in range(3)
+    )))
+
+    settings = get_project_settings()
+    settings.set("DB_FLUSH_INTERVAL", 0)
+    settings.set("LOG_LEVEL", "WARNING")
+    process = CrawlerProcess(settings)
+    process.crawl(VentureLaneSpider, start_urls=[page.as_uri()])
+    process.start()
+
+    assert session.query(Event).filter_by(source="Venture Lane").count() == 3
+    # The Source row is named after config.yaml, its events after the spider
+    source = session.query(Source).filter_by(name="The Venture Lane").one()
+    assert source.event_source == "Venture Lane"
+    assert source.event_count == 3
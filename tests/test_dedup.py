@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from database import Event, get_generation, sync_events
+from database.dedup import find_duplicates, merge_duplicates
+
+from .conftest import event_row
+
+
+def test_same_title_elsewhere_is_another_event(session):
+    evening = datetime(2030, 5, 14, 18, 0)
+    stored = event_row("AI Demo Night", evening, source="Luma", location="CIC Cambridge, 1 Broadway")
+    sync_events(session, [stored])
+    session.commit()
+
+    same = event_row("Boston AI Demo Night", evening, source="Meetup", location="CIC, 1 Broadway, Cambridge")
+    online = event_row("AI Demo Night", evening, source="Eventbrite", location="Online")
+    other_venue = event_row("AI Demo Night", evening, source="Meetup", location="WeWork Fort Point")
+    morning = event_row("AI Demo Night", evening.replace(hour=9), source="Eventbrite", location="CIC Cambridge")
+
+    assert find_duplicates(session, [same, online]) == {same["id"]: stored["id"], online["id"]: stored["id"]}
+    assert find_duplicates(session, [other_venue]) == {}
+    assert find_duplicates(session, [morning]) == {}
+
+
+def test_merging_again_writes_nothing(session):
+    evening = datetime(2030, 5, 14, 18, 0)
+    canonical = event_row("AI Demo Night", evening, source="Luma", location="CIC Cambridge")
+    copy = event_row("AI Demo Night", evening, source="Meetup", location="CIC Cambridge")
+    sync_events(session, [canonical, copy])
+    session.commit()
+
+    assert merge_duplicates(session, [copy]) == []
+    session.commit()
+    generation = get_generation(session)
+    updated_at = session.get(Event, copy["id"]).updated_at
+    assert not session.get(Event, copy["id"]).is_active
+
+    assert merge_duplicates(session, [copy]) == []
+    session.commit()
+    session.expire_all()
+    assert get_generation(session) == generation
+    assert session.get(Event, copy["id"]).updated_at == updated_at
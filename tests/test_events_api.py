@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta
+
+from database import sync_events
+
+from .conftest import event_row
+
+
+def test_cursor_pages_have_no_offset(client, session):
+    start = datetime.utcnow() + timedelta(days=1)
+    sync_events(session, [event_row(f"Pitch Night {i}", start + timedelta(hours=i)) for i in range(3)])
+    session.commit()
+
+    first = client.get("/api/events", params={"limit": 2, "offset": 1}).json()
+    assert first["offset"] == 1
+    first = client.get("/api/events", params={"limit": 2}).json()
+    second = client.get("/api/events", params={"limit": 2, "offset": 1, "cursor": first["next_cursor"]}).json()
+    assert second["offset"] is None
+    assert [e["title"] for e in second["events"]] == ["Pitch Night 2"]
+
+
+def test_thread_limit_follows_the_engine_pool(database_url):
+    from sqlalchemy import create_engine
+
+    from api.main import thread_limit
+    from database import get_engine
+
+    assert thread_limit(get_engine(database_url)) is None  # SQLite keeps anyio's default
+    engine = create_engine("postgresql+psycopg2://events@localhost/events", pool_size=3, max_overflow=2)
+    assert thread_limit(engine) == 5
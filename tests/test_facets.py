@@ -0,0 +1,60 @@
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from database import Event, EventFacet, sync_events
+from database.facets import event_facets, get_facets
+
+from .conftest import event_row
+
+
+def stored_counters(session) -> Counter:
+    return Counter({(f.facet, f.value, f.day): f.count for f in session.query(EventFacet)})
+
+
+def expected_counters(session) -> Counter:
+    counts = Counter()
+    query = select(Event.source, Event.date, Event.location, Event.tags_json).where(Event.is_active == True)
+    for row in session.execute(query):
+        counts.update(event_facets(*row))
+    return counts
+
+
+def test_sync_events_keeps_counters_in_step(session):
+    start = datetime.utcnow() + timedelta(days=1)
+    rows = [event_row(f"Talk {i}", start + timedelta(hours=i), location="Zoom" if i % 2 else "MIT", tags=["AI"]) for i in range(4)]
+    sync_events(session, rows)
+    session.commit()
+    assert stored_counters(session) == expected_counters(session)
+    assert get_facets(session)["total"] == 4
+
+    moved = dict(rows[0], date=start + timedelta(days=3), tags_json='["Bio"]')
+    moved["content_hash"] = "changed"
+    sync_events(session, [moved])
+    session.commit()
+    assert stored_counters(session) == expected_counters(session)
+    assert get_facets(session)["tags"] == {"ai": 3, "bio": 1}
+
+
+def test_search_events_are_counted(session, monkeypatch):
+    for module in ("tavily", "groq", "cerebras.cloud.sdk", "google.generativeai", "httpx", "dotenv"):
+        pytest.importorskip(module)
+    for key in ("TAVILY_API_KEY", "CEREBRAS_API_KEY", "GROQ_API_KEY"):
+        monkeypatch.setenv(key, "test")
+    import search_events
+
+    start = datetime.utcnow() + timedelta(days=2)
+    sync_events(session, [event_row("Robotics Night", start, source="Luma")])
+    session.commit()
+    search_events.save_events_to_db([
+        {"title": f"Founder Breakfast {i}", "date": (start + timedelta(days=i)).isoformat(),
+         "url": f"https://example.com/search/{i}", "location": "Cambridge", "description": ""}
+        for i in range(3)
+    ])
+
+    session.expire_all()
+    assert session.query(Event).filter(Event.is_active == True).count() == 4
+    assert get_facets(session)["total"] == 4
+    assert stored_counters(session) == expected_counters(session)
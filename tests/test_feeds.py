@@ -0,0 +1,43 @@
+import json
+from datetime import datetime, timedelta
+
+import feeds
+from database import get_generation, sync_events
+
+from .conftest import event_row
+
+
+def test_sources_with_the_same_slug_get_their_own_feeds(session, tmp_path):
+    day = datetime.utcnow() + timedelta(days=2)
+    sync_events(session, [
+        event_row("Templates in Practice", day, source="C++ Meetup"),
+        event_row("Pointers Night", day, source="C Meetup"),
+    ])
+    session.commit()
+
+    feeds.write_feeds(str(tmp_path))
+
+    for source, title in (("C++ Meetup", b"Templates in Practice"), ("C Meetup", b"Pointers Night")):
+        body = feeds.prebuilt_feed(source=source, directory=str(tmp_path))
+        assert title in body
+    assert len(list((tmp_path / "rss" / "source").iterdir())) == 2
+
+
+def test_unchanged_feeds_keep_the_generation(session, tmp_path):
+    sync_events(session, [event_row("Pitch Night", datetime.utcnow() + timedelta(days=2))])
+    session.commit()
+    assert feeds.write_feeds(str(tmp_path)) == 4  # all and Luma, in RSS and Atom
+    generation = get_generation(session)
+
+    assert feeds.write_feeds(str(tmp_path)) == 0
+    # An hour on, the feeds are rebuilt, but nothing is written
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    manifest["generated_at"] = (datetime.utcnow() - feeds.REBUILD_AFTER).isoformat()
+    (tmp_path / "manifest.json").write_text(json.dumps(manifest))
+    assert feeds.write_feeds(str(tmp_path)) == 0
+    assert get_generation(session) == generation
+
+    sync_events(session, [event_row("Demo Day", datetime.utcnow() + timedelta(days=3))])
+    session.commit()
+    assert feeds.write_feeds(str(tmp_path)) == 4
+    assert get_generation(session)[0] == generation[0] + 2  # the sync, then the new files
@@ -0,0 +1,25 @@
+import re
+from datetime import datetime, timedelta
+
+from api.cache import response_cache
+from api.fragments import HOME_LIMIT
+from database import sync_events
+
+from .conftest import event_row
+
+
+def test_chips_count_the_cards_shown(client, session):
+    start = datetime.utcnow() + timedelta(days=1)
+    rows = [event_row(f"Early {i}", start + timedelta(minutes=i), source="Luma") for i in range(HOME_LIMIT)]
+    # Beyond the cards the page shows
+    rows += [event_row(f"Late {i}", start + timedelta(days=10, minutes=i), source="Meetup") for i in range(50)]
+    sync_events(session, rows)
+    session.commit()
+    response_cache.clear()
+
+    html = client.get("/").text
+    assert html.count('class="card"') == HOME_LIMIT
+    chips = re.findall(r"setSourceFilter\('([^']+)'", html)
+    assert chips == ["all", "Luma"]
+    assert re.search(r"All Sources <span[^>]*>\((\d+)\)", html).group(1) == str(HOME_LIMIT)
+    assert re.search(r"Showing the next (\d+)\s+of (\d+) upcoming events", html).groups() == (str(HOME_LIMIT), "350")
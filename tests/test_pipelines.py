@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from scrapy.statscollectors import MemoryStatsCollector
+from scrapy.utils.test import get_crawler
+
+import crawler.pipelines
+from crawler.pipelines import DatabasePipeline
+from database import Event, sync_events
+
+from .conftest import event_row
+
+
+def test_row_by_row_fallback_merges_duplicates(database_url, session, monkeypatch):
+    calls = []
+
+    def fail_first_batch(session, rows):
+        calls.append(rows)
+        if len(calls) == 1:
+            raise RuntimeError("batch failed")
+        return sync_events(session, rows)
+
+    monkeypatch.setattr(crawler.pipelines, "sync_events", fail_first_batch)
+    evening = datetime(2030, 5, 14, 18, 0)
+    stored = event_row("AI Demo Night", evening, source="Luma", location="CIC Cambridge")
+    sync_events(session, [stored])
+    session.commit()
+
+    stats = MemoryStatsCollector(get_crawler())
+    pipeline = DatabasePipeline(stats, flush_interval=0)
+    spider = type("Spider", (), {"name": "meetup"})()
+    pipeline.open_spider(spider)
+    for row in (
+        event_row("AI Demo Night", evening, source="Meetup", location="CIC Cambridge"),
+        event_row("Robotics Social", evening, source="Meetup"),
+        event_row("Robotics Social", evening, source="Eventbrite"),
+    ):
+        pipeline.buffer[row["id"]] = row
+    pipeline.close_spider(spider)
+
+    assert len(calls) == 4  # the batch, then each row
+    assert sorted(source for (source,) in session.query(Event.source).filter_by(is_active=True)) == ["Luma", "Meetup"]
+    assert stats.get_value("events/new") == 1
+    assert stats.get_value("events/merged") == 2
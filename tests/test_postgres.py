@@ -0,0 +1,74 @@
+"""PostgreSQL write and search paths; skipped without a server (see conftest.py)."""
+
+from datetime import datetime, timedelta
+
+from database import Event, EventTag, sync_events
+from database.search import full_text_search
+
+from .conftest import event_row
+from .test_facets import expected_counters, stored_counters
+
+
+def tags_of(session, event_id):
+    return {t for (t,) in session.query(EventTag.tag).filter_by(event_id=event_id)}
+
+
+def test_sync_events_copy(pg_session):
+    session = pg_session
+    start = datetime.utcnow() + timedelta(days=1)
+    rows = [
+        event_row("Demo Day", start, tags=["AI", "Startups"], location="MIT Media Lab"),
+        event_row("Bio Mixer", start + timedelta(days=2), tags=["Bio"], location="Zoom"),
+        event_row("Tab\tand\\backslash\nnight", start + timedelta(days=3), description="multi\nline"),
+    ]
+    assert sync_events(session, rows) == {"new": 3, "updated": 0, "unchanged": 0}
+    session.commit()
+    assert session.query(Event).count() == 3
+    assert session.get(Event, rows[2]["id"]).title == "Tab\tand\\backslash\nnight"
+    assert tags_of(session, rows[0]["id"]) == {"ai", "startups"}
+    assert stored_counters(session) == expected_counters(session)
+    created_at = session.get(Event, rows[0]["id"]).created_at
+
+    changed = dict(rows[0], title="Demo Day (moved)", date=start + timedelta(days=5), tags_json='["Robotics"]')
+    changed["content_hash"] = "changed"
+    assert sync_events(session, [changed, rows[1], rows[2]]) == {"new": 0, "updated": 1, "unchanged": 2}
+    session.commit()
+    session.expire_all()
+    event = session.get(Event, rows[0]["id"])
+    assert event.title == "Demo Day (moved)"
+    assert event.created_at == created_at
+    assert tags_of(session, rows[0]["id"]) == {"robotics"}
+    assert tags_of(session, rows[1]["id"]) == {"bio"}
+    assert stored_counters(session) == expected_counters(session)
+
+    # A deactivated event comes back on its next sync, even unchanged
+    session.query(Event).filter_by(id=rows[1]["id"]).update({"is_active": False})
+    session.commit()
+    assert sync_events(session, [rows[1]]) == {"new": 0, "updated": 1, "unchanged": 0}
+    session.commit()
+    assert session.get(Event, rows[1]["id"]).is_active
+
+
+def test_snippet_escapes_event_html(pg_session):
+    session = pg_session
+    hostile = event_row(
+        "Robotics Night", datetime.utcnow() + timedelta(days=1),
+        description="Robotics <img src=x onerror=alert(1)> night",
+    )
+    sync_events(session, [hostile])
+    session.commit()
+
+    total, hits = full_text_search(session, "robotics")
+    assert total == 1
+    assert "<img" not in hits[0]["snippet"]
+    assert "<mark>Robotics</mark>" in hits[0]["snippet"]
+
+
+def test_snippet_covers_the_location(pg_session):
+    session = pg_session
+    sync_events(session, [event_row("Demo Day", datetime.utcnow() + timedelta(days=1), location="Greentown Labs")])
+    session.commit()
+
+    total, hits = full_text_search(session, "greentown")
+    assert total == 1
+    assert "<mark>Greentown</mark>" in hits[0]["snippet"]
@@ -0,0 +1,36 @@
+import pytest
+from scrapy import Request
+from scrapy.exceptions import IgnoreRequest
+from scrapy.http import HtmlResponse
+from scrapy.statscollectors import MemoryStatsCollector
+from scrapy.utils.test import get_crawler
+
+from crawler.middlewares import RevalidationMiddleware
+
+URL = "https://example.com/events"
+BODY = b"<html><body>Events</body></html>"
+
+
+@pytest.fixture
+def middleware(database_url):
+    return RevalidationMiddleware(MemoryStatsCollector(get_crawler()))
+
+
+def fetch(middleware, **meta):
+    request = Request(URL, meta={"revalidate": True, **meta})
+    middleware.process_request(request, None)
+    response = HtmlResponse(URL, body=BODY, request=request)
+    return middleware.process_response(request, response, None)
+
+
+def test_unchanged_listing_is_skipped(middleware):
+    fetch(middleware)
+    with pytest.raises(IgnoreRequest):
+        fetch(middleware)
+
+
+def test_listing_with_live_page_is_always_parsed(middleware):
+    meta = {"playwright": True, "playwright_include_page": True}
+    fetch(middleware, **meta)
+    # The spider scrolls the page for more events and closes it
+    assert fetch(middleware, **meta).body == BODY
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+
+from database import sync_events
+from database.search import full_text_search
+
+from .conftest import event_row
+
+
+def test_snippet_escapes_event_html(session):
+    start = datetime.utcnow() + timedelta(days=1)
+    hostile = event_row(
+        "Robotics Night", start,
+        description='Robotics <img src=x onerror=alert(1)> night <script>alert("x")</script>',
+    )
+    sync_events(session, [hostile])
+    session.commit()
+
+    total, hits = full_text_search(session, "robotics onerror")
+    assert total == 1
+    snippet = hits[0]["snippet"]
+    assert "<img" not in snippet and "<script" not in snippet
+    assert "&lt;img src=x <mark>onerror</mark>=alert(1)&gt;" in snippet
+    assert "<mark>Robotics</mark>" in snippet
+
+
+def test_other_databases_fall_back_to_like_matching(session, monkeypatch):
+    start = datetime.utcnow() + timedelta(days=1)
+    sync_events(session, [
+        event_row("Robotics Night", start, description="Demos <b>and</b> drinks", location="Greentown Labs"),
+        event_row("Bio Mixer", start, location="LabCentral"),
+    ])
+    session.commit()
+    monkeypatch.setattr(session.get_bind().dialect, "name", "mysql")
+
+    total, hits = full_text_search(session, "robotics greentown")
+    assert total == 1
+    assert hits[0]["snippet"] == (
+        "<mark>Robotics</mark> Night — Demos &lt;b&gt;and&lt;/b&gt; drinks — <mark>Greentown</mark> Labs"
+    )
@@ -0,0 +1,24 @@
+from types import SimpleNamespace
+
+from scrapy import Request, Spider
+from scrapy.core.downloader import Slot
+from scrapy.http import Response
+from scrapy.utils.test import get_crawler
+
+from crawler.middlewares import AdaptiveThrottleMiddleware
+
+
+def test_backoff_goes_into_the_slot_delay():
+    crawler = get_crawler(settings_dict={"ADAPTIVE_THROTTLE_HTTP_CODES": [429]})
+    slot = Slot(concurrency=8, delay=0.0)
+    crawler.engine = SimpleNamespace(downloader=SimpleNamespace(slots={"example.com": slot}))
+    middleware = AdaptiveThrottleMiddleware(crawler)
+    spider = Spider.from_crawler(crawler, name="test")
+    request = Request("https://example.com/events", meta={"download_slot": "example.com"})
+
+    response = Response(request.url, status=429, headers={"Retry-After": "30"}, request=request)
+    retry = middleware.process_response(request, response, spider)
+
+    assert isinstance(retry, Request) and retry.meta["retry_times"] == 1
+    assert slot.delay == 30
+    assert slot.concurrency == 4